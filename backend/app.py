@@ -8,15 +8,20 @@ Version: 1.0.0
 """
 
 import os
-from flask import Flask, jsonify
+import re
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 from src.config import Config
-from src.extensions import mongo, jwt, api, limiter
+from src.extensions import mongo, jwt, api, limiter, compress, OrjsonProvider
 from src.routes import auth_ns, health_ns, posts_ns, profile_ns, feed_ns, likes_ns, comments_ns, replies_ns, notifications_ns, register_error_handlers
-from src.database.indexes import initialize_database_indexes
+from src.database.indexes import initialize_database_indexes, backfill_user_posts_counts
 from src.logger import logger
 
 
+# Encoding suffix Flask-Compress appends to ETags (e.g. "abc123:gzip")
+ENCODED_ETAG_SUFFIX = re.compile(r':(?:br|gzip|deflate|zstd)"')
+
+
 def validate_required_config():
     """Validate that all required environment variables are set"""
     required_vars = ["SECRET_KEY", "MONGO_URI", "JWT_SECRET_KEY"]
@@ -40,24 +45,40 @@ def create_app():
     
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.json = OrjsonProvider(app)
     
     # Enable CORS for frontend (supports multiple origins for production)
+    # max_age lets browsers cache preflight responses for 24 hours, and the
+    # pagination headers are exposed so the SPA can read them cross-origin
+    cors_options = {
+        "supports_credentials": True,
+        "max_age": 86400,
+        "expose_headers": ["X-Total-Count", "X-Page", "X-Limit", "X-Next-Cursor"]
+    }
     if Config.CORS_ORIGINS == ["*"]:
         # Development: Allow all origins
-        CORS(app, supports_credentials=True)
+        CORS(app, **cors_options)
     else:
         # Production: Specific origins only
-        CORS(app, origins=Config.CORS_ORIGINS, supports_credentials=True)
+        CORS(app, origins=Config.CORS_ORIGINS, **cors_options)
 
     # Initialize extensions
-    mongo.init_app(app)
+    mongo.init_app(
+        app,
+        maxPoolSize=Config.MONGO_MAX_POOL_SIZE,
+        minPoolSize=Config.MONGO_MIN_POOL_SIZE,  # Keep warm connections to skip connect/TLS handshakes
+        maxIdleTimeMS=300000
+    )
     jwt.init_app(app)
     api.init_app(app)
     limiter.init_app(app)
+    # Registered before the hooks below so it runs after them and compresses the final body
+    compress.init_app(app)
     
-    # Initialize database indexes for performance
-    with app.app_context():
-        initialize_database_indexes()
+    # Initialize database indexes for performance (once per process, skipped in tests)
+    if not app.config.get("TESTING"):
+        with app.app_context():
+            initialize_database_indexes()
 
     # Add namespaces to API
     api.add_namespace(auth_ns, path="/auth")
@@ -73,6 +94,38 @@ def create_app():
     # Register global error handlers
     register_error_handlers(app)
 
+    @app.cli.command("backfill-posts-counts")
+    def backfill_posts_counts_command():
+        """One-off migration: store posts_count on users created before the counter existed (run with writes stopped)"""
+        backfill_user_posts_counts()
+
+    @app.after_request
+    def add_conditional_get(response):
+        """
+        Tag successful JSON GET responses with an ETag so repeat views
+        (e.g. re-opening a post's comments) get an empty 304 instead of the full body.
+        """
+        if request.method == "GET" and response.status_code == 200 and response.mimetype == "application/json" and not response.is_streamed:
+            # Responses are per-user (liked flags), so only the browser may cache them
+            response.headers["Cache-Control"] = "private, no-cache"
+            response.add_etag()
+            # Compression suffixes the ETag it sends with ":<encoding>", so strip that
+            # from the client's validator before comparing against the plain body hash
+            environ = request.environ
+            if_none_match = environ.get("HTTP_IF_NONE_MATCH")
+            if if_none_match and ":" in if_none_match:
+                environ = {**environ, "HTTP_IF_NONE_MATCH": ENCODED_ETAG_SUFFIX.sub('"', if_none_match)}
+            response.make_conditional(environ)
+        return response
+
+    @app.after_request
+    def no_content_preflight(response):
+        """CORS preflight responses carry no body, so answer them with 204"""
+        if request.method == "OPTIONS" and request.headers.get("Access-Control-Request-Method") and response.status_code == 200:
+            response.status_code = 204
+            response.set_data(b"")
+        return response
+
     # Home route
     @app.route('/')
     def home():
@@ -0,0 +1,32 @@
+"""
+Gunicorn Configuration
+
+Production server settings for the DevShare API.
+
+Usage:
+    gunicorn -c gunicorn.conf.py app:app
+"""
+
+import multiprocessing
+import os
+
+# Bind address
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+
+# Threaded workers: request handlers spend most of their time waiting on MongoDB/Redis,
+# so each worker serves several requests concurrently while others wait on IO.
+# (gthread is used instead of gevent because PyMongo is thread-safe without monkey patching.)
+worker_class = "gthread"
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+
+# Keep idle client connections open briefly for reuse behind a load balancer
+keepalive = 5
+timeout = 60
+
+# Load the app in each worker (MongoClient must not be created before fork)
+preload_app = False
+
+# Log to stdout/stderr (application logs still go through src.logger)
+accesslog = "-"
+errorlog = "-"
@@ -15,6 +15,10 @@ class Config:
     """Flask app configuration"""
     SECRET_KEY = os.environ.get("SECRET_KEY")
     MONGO_URI = os.environ.get("MONGO_URI")
+    
+    # MongoDB connection pool (shared by all request threads in a worker)
+    MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", max((os.cpu_count() or 1) * 4, 32)))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", 4))
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY")
     
     # CORS Configuration (for development, allows all origins - restrict in production)
@@ -25,6 +29,22 @@ class Config:
         # Development: Allow all origins if not specified
         CORS_ORIGINS = ["*"]
     
+    # Redis URL for rate limiting and token revocation (falls back to in-memory storage)
+    RATELIMIT_STORAGE_URL = os.environ.get("RATELIMIT_STORAGE_URL", "memory://")
+    # Redis connections the rate limiter may hold per process (checks wait briefly for a free one)
+    RATELIMIT_REDIS_MAX_CONNECTIONS = int(os.environ.get("RATELIMIT_REDIS_MAX_CONNECTIONS", 64))
+    # Like toggles one user may have in flight at once (needs Redis), and how long (seconds)
+    # a slot is held if a request never releases it
+    MAX_CONCURRENT_TOGGLES = int(os.environ.get("MAX_CONCURRENT_TOGGLES", 10))
+    CONCURRENT_REQUEST_SLOT_TTL = int(os.environ.get("CONCURRENT_REQUEST_SLOT_TTL", 30))
+    
+    # Response compression (Flask-Compress): brotli for modern clients, gzip otherwise;
+    # tiny bodies are sent as-is since compressing them costs more than it saves
+    COMPRESS_ALGORITHM = ["br", "gzip"]
+    COMPRESS_MIN_SIZE = 500
+    # File downloads are streamed from GridFS (and may be byte ranges), so leave streams as-is
+    COMPRESS_STREAMS = False
+    
     # JWT Token Expiration Settings
     JWT_ACCESS_TOKEN_EXPIRES = datetime.timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = datetime.timedelta(days=7)
@@ -3,20 +3,60 @@ Database Indexes Initialization
 
 Creates database indexes for frequently queried fields to improve query performance.
 All indexes are created with background=True to avoid blocking operations.
+Also provides the one-off backfill for denormalized counters that older documents are missing.
 """
 
+from pymongo import UpdateOne
 from src.extensions import mongo
 from src.logger import logger
 
+# Set once indexes have been ensured in this process
+_indexes_initialized = False
+
+
+def backfill_user_posts_counts():
+    """
+    Store posts_count on users created before the counter existed.
+    
+    One-off migration, run with `flask --app app backfill-posts-counts` while no
+    app process is creating or deleting posts. It is not safe alongside live
+    traffic: a post created or deleted between the count and the $set is skipped
+    by increment_user_posts_count (the user has no counter yet) and the stored
+    value ends up stale. Until it has run, get_user_posts_count counts those
+    users' posts live, so reads stay correct either way. Users that already
+    have a counter are never overwritten, so re-running it is harmless.
+    """
+    missing_ids = [user["_id"] for user in mongo.db.users.find({"posts_count": {"$exists": False}}, {"_id": 1})]
+    if not missing_ids:
+        return
+    
+    # Count everyone's posts in one pass
+    counts = {
+        row["_id"]: row["count"]
+        for row in mongo.db.posts.aggregate([
+            {"$match": {"user_id": {"$in": missing_ids}}},
+            {"$group": {"_id": "$user_id", "count": {"$sum": 1}}}
+        ])
+    }
+    mongo.db.users.bulk_write([
+        UpdateOne({"_id": user_id, "posts_count": {"$exists": False}}, {"$set": {"posts_count": counts.get(user_id, 0)}})
+        for user_id in missing_ids
+    ], ordered=False)
+    logger.info(f"Backfilled posts_count for {len(missing_ids)} users")
+
 
 def initialize_database_indexes():
     """
     Create database indexes for frequently queried fields to improve query performance.
-    This is called once when the app starts.
+    This is called once when the app starts; repeat calls in the same process are skipped.
     
     All indexes are created with background=True to avoid blocking database operations.
     Errors are handled gracefully as indexes may already exist.
     """
+    global _indexes_initialized
+    if _indexes_initialized:
+        return
+    
     try:
         # Users collection indexes
         # Index for email (used in login)
@@ -29,10 +69,16 @@ def initialize_database_indexes():
         # Posts collection indexes
         # Index for user_id (used in profile posts)
         mongo.db.posts.create_index("user_id", background=True)
+        # Compound indexes for profile post listing (user filter + sort served by one index scan)
+        mongo.db.posts.create_index([("user_id", 1), ("created_at", -1), ("_id", -1)], background=True)
+        mongo.db.posts.create_index([("user_id", 1), ("title", 1)], background=True)
+        mongo.db.posts.create_index([("user_id", 1), ("updated_at", -1)], background=True)
         # Index for created_at (used in feed sorting)
         mongo.db.posts.create_index("created_at", background=True)
         # Index for tech_stack (used in filtering)
         mongo.db.posts.create_index("tech_stack", background=True)
+        # Compound index for the default tech_stack-filtered feed (filter + newest-first sort)
+        mongo.db.posts.create_index([("tech_stack", 1), ("created_at", -1)], background=True)
         # Indexes for search queries (title and description - used in regex searches)
         mongo.db.posts.create_index("title", background=True)
         mongo.db.posts.create_index("description", background=True)
@@ -44,14 +90,26 @@ def initialize_database_indexes():
         mongo.db.notifications.create_index("created_at", background=True)
         # Index for recipient_id (used in queries)
         mongo.db.notifications.create_index("recipient_id", background=True)
+        # Compound index for recipient_id and created_at (used in newest-first and cursor listing, no in-memory sort)
+        mongo.db.notifications.create_index([("recipient_id", 1), ("created_at", -1), ("_id", -1)], background=True)
+        # Indexes for actor_id and post_id (used in account and post cascade deletes - every
+        # branch of the account deletion $or must be indexed to avoid a collection scan)
+        mongo.db.notifications.create_index("actor_id", background=True)
+        mongo.db.notifications.create_index("post_id", background=True)
         # Compound index for notification deletion (recipient_id, actor_id, type)
         mongo.db.notifications.create_index([("recipient_id", 1), ("actor_id", 1), ("type", 1)], background=True)
+        # Index for comment_id (used in comment cascade deletes)
+        mongo.db.notifications.create_index("comment_id", background=True)
+        # Index for reply_id (used in reply cascade deletes)
+        mongo.db.notifications.create_index("reply_id", background=True)
         
         # Likes collection indexes
         # Compound index for user_id and post_id (used in like status checks)
         mongo.db.likes.create_index([("user_id", 1), ("post_id", 1)], unique=True, background=True)
         # Index for post_id (used to get all likes for a post)
         mongo.db.likes.create_index("post_id", background=True)
+        # Compound index for post_id and created_at (used in paginated like listing)
+        mongo.db.likes.create_index([("post_id", 1), ("created_at", -1), ("_id", -1)], background=True)
         
         # Comments collection indexes
         # Index for post_id (used to get all comments for a post)
@@ -60,27 +118,42 @@ def initialize_database_indexes():
         mongo.db.comments.create_index("user_id", background=True)
         # Index for created_at (used in sorting)
         mongo.db.comments.create_index("created_at", background=True)
+        # Compound index for post_id and created_at (used in paginated comment listing)
+        mongo.db.comments.create_index([("post_id", 1), ("created_at", -1), ("_id", -1)], background=True)
         
         # Comment likes collection indexes
         # Compound index for user_id and comment_id (used in like status checks)
         mongo.db.comment_likes.create_index([("user_id", 1), ("comment_id", 1)], unique=True, background=True)
         # Index for comment_id (used to get all likes for a comment)
         mongo.db.comment_likes.create_index("comment_id", background=True)
+        # Index for post_id (used in post cascade deletes)
+        mongo.db.comment_likes.create_index("post_id", background=True)
+        # Compound index for comment_id and created_at (used in paginated like listing)
+        mongo.db.comment_likes.create_index([("comment_id", 1), ("created_at", -1), ("_id", -1)], background=True)
         
         # Replies collection indexes
         # Index for comment_id (used to get all replies for a comment)
         mongo.db.replies.create_index("comment_id", background=True)
         # Index for user_id (used in profile queries)
         mongo.db.replies.create_index("user_id", background=True)
+        # Index for post_id (used in post cascade deletes)
+        mongo.db.replies.create_index("post_id", background=True)
         # Index for created_at (used in sorting)
         mongo.db.replies.create_index("created_at", background=True)
+        # Compound index for comment_id and created_at (used in paginated reply listing)
+        mongo.db.replies.create_index([("comment_id", 1), ("created_at", -1), ("_id", -1)], background=True)
         
         # Reply likes collection indexes
         # Compound index for user_id and reply_id (used in like status checks)
         mongo.db.reply_likes.create_index([("user_id", 1), ("reply_id", 1)], unique=True, background=True)
         # Index for reply_id (used to get all likes for a reply)
         mongo.db.reply_likes.create_index("reply_id", background=True)
+        # Index for post_id (used in post cascade deletes)
+        mongo.db.reply_likes.create_index("post_id", background=True)
+        # Compound index for reply_id and created_at (used in paginated like listing)
+        mongo.db.reply_likes.create_index([("reply_id", 1), ("created_at", -1), ("_id", -1)], background=True)
         
+        _indexes_initialized = True
         logger.info("Database indexes initialized successfully")
     except Exception as e:
         # Log error but don't crash the app - indexes may already exist
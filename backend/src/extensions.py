@@ -4,12 +4,17 @@ DevShare Extensions
 Initialize all third-party extensions here.
 """
 
+from flask import current_app, make_response
+from flask.json.provider import JSONProvider
 from flask_pymongo import PyMongo
 from flask_jwt_extended import JWTManager
 from flask_restx import Api
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-import os
+from flask_compress import Compress
+from src.config import Config
+import orjson
+import redis
 
 # MongoDB extension
 mongo = PyMongo()
@@ -17,6 +22,23 @@ mongo = PyMongo()
 # JWT extension for authentication
 jwt = JWTManager()
 
+# Response compression extension (gzip/brotli for JSON list responses)
+compress = Compress()
+
+# Shared Redis client (token revocation, cached counters) - None when Redis is not configured
+_redis_client = None
+
+
+def get_redis():
+    """Get the shared Redis client if Redis is configured (client and its connection pool are reused across requests)"""
+    global _redis_client
+    if _redis_client is None and Config.RATELIMIT_STORAGE_URL.startswith(("redis://", "rediss://")):
+        try:
+            _redis_client = redis.from_url(Config.RATELIMIT_STORAGE_URL, decode_responses=True)
+        except Exception:
+            return None
+    return _redis_client
+
 # Flask-RESTX extension for API
 api = Api(
     title="DevShare",
@@ -26,13 +48,59 @@ api = Api(
     version="1.0.0"
 )
 
-# Get Redis URL from environment, fallback to in-memory for development
-redis_url = os.getenv("RATELIMIT_STORAGE_URL", "memory://")
+# orjson options shared by API responses and Flask's jsonify
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson (used by jsonify and error handlers)"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=str, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Build a jsonify response straight from orjson bytes (no str round trip)"""
+        obj = self._prepare_response_obj(args, kwargs)
+        option = ORJSON_OPTIONS
+        if self._app.debug:
+            option |= orjson.OPT_INDENT_2
+        return self._app.response_class(
+            orjson.dumps(obj, default=str, option=option) + b"\n", mimetype="application/json"
+        )
+
+
+@api.representation("application/json")
+def output_json(data, code, headers=None):
+    """Serialize Flask-RESTX resource responses with orjson"""
+    option = ORJSON_OPTIONS
+    if current_app.debug:
+        option |= orjson.OPT_INDENT_2
+    # Unknown types (ObjectId, etc.) fall back to their string form
+    resp = make_response(orjson.dumps(data, default=str, option=option) + b"\n", code)
+    resp.headers.extend(headers or {})
+    return resp
+
+# Get Redis URL from configuration, fallback to in-memory for development
+redis_url = Config.RATELIMIT_STORAGE_URL
+
+# Bounded connection pool for rate-limit checks so bursts reuse connections instead of
+# opening new ones (each check is a single Lua script call with the fixed-window strategy)
+_limiter_storage_options = {}
+if redis_url.startswith(("redis://", "rediss://")):
+    _limiter_storage_options["connection_pool"] = redis.BlockingConnectionPool.from_url(
+        redis_url,
+        max_connections=Config.RATELIMIT_REDIS_MAX_CONNECTIONS,
+        timeout=0.1
+    )
 
 # Rate limiter extension
 limiter = Limiter(
     key_func=get_remote_address,   # Identifies client by IP
     storage_uri=redis_url,         # Redis storage for rate limiting
+    storage_options=_limiter_storage_options,
     default_limits=["200 per day", "50 per hour"],  # Fallback limits
     swallow_errors=True            # Don't fail if Redis is unavailable
 )
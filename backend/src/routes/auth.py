@@ -14,32 +14,21 @@ from flask import request
 from flask_restx import Namespace, Resource, fields
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
-from src.extensions import mongo, jwt, limiter
+from src.extensions import mongo, jwt, limiter, get_redis
 from src.logger import logger
+from bson import ObjectId
 import datetime
 import re
-import os
-import redis
 
 # Namespace
 auth_ns = Namespace("auth", description="Authentication operations")
 
 # Simple token revocation - uses Redis if available, falls back to in-memory
-_redis_url = os.getenv("RATELIMIT_STORAGE_URL", "memory://")
 _jwt_blocklist = set()
 
-def _get_redis():
-    """Get Redis connection if available"""
-    if _redis_url.startswith(("redis://", "rediss://")):
-        try:
-            return redis.from_url(_redis_url, decode_responses=True)
-        except:
-            return None
-    return None
-
 def revoke_token(jti, expires_in=None):
     """Revoke a JWT token"""
-    r = _get_redis()
+    r = get_redis()
     if r:
         try:
             r.setex(f"jwt:revoked:{jti}", expires_in or 3600, "1")
@@ -51,7 +40,7 @@ def revoke_token(jti, expires_in=None):
 
 def is_token_revoked(jti):
     """Check if token is revoked"""
-    r = _get_redis()
+    r = get_redis()
     if r:
         try:
             return r.exists(f"jwt:revoked:{jti}") > 0
@@ -131,7 +120,7 @@ class Register(Resource):
             return {"message": "Passwords and confirm passwords do not match"}, 400
 
         # Check if user/email exists
-        if mongo.db.users.find_one({"$or": [{"email": email}, {"username": username}]}):
+        if mongo.db.users.count_documents({"$or": [{"email": email}, {"username": username}]}, limit=1):
             return {"message": "User with this email or username already exists"}, 400
 
         # Create user
@@ -141,6 +130,7 @@ class Register(Resource):
             "email": email,
             "password": generate_password_hash(password),
             "status": "active",   # default active
+            "posts_count": 0,     # maintained on post create/delete
             "created_at": datetime.datetime.utcnow()
         }
         mongo.db.users.insert_one(user)
@@ -176,20 +166,29 @@ class Login(Resource):
             return {"message": "Both username/email and password are required"}, 400
 
         # Find user by email or username
-        user = mongo.db.users.find_one({"$or": [{"email": identifier}, {"username": identifier}]})
+        user = mongo.db.users.find_one(
+            {"$or": [{"email": identifier}, {"username": identifier}]},
+            {"username": 1, "email": 1, "password": 1, "status": 1}
+        )
         if not user or user.get("status") != "active":
             return {"message": "Invalid credentials or inactive user"}, 401
 
         if not check_password_hash(user["password"], password):
             return {"message": "Invalid credentials"}, 401
 
-        access_token = create_access_token(identity=str(user["_id"]))
+        claims = _user_claims(user)
+        access_token = create_access_token(identity=str(user["_id"]), additional_claims=claims)
         refresh_token = create_refresh_token(identity=str(user["_id"]))
 
         logger.info(f"User logged in: {identifier}")
         return {"access_token": access_token, "refresh_token": refresh_token}, 200
 
 
+def _user_claims(user):
+    """Build the user profile claims embedded in access tokens"""
+    return {"username": user["username"], "email": user["email"]}
+
+
 def _get_token_ttl(jwt_data):
     """Calculate token TTL from JWT expiration"""
     if jwt_data.get("exp"):
@@ -228,7 +227,11 @@ class Refresh(Resource):
         
         revoke_token(jwt_data["jti"], _get_token_ttl(jwt_data))
         
+        # Re-read profile claims so username/email changes are picked up on refresh
+        user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"username": 1, "email": 1})
+        claims = _user_claims(user) if user else {}
+        
         return {
-            "access_token": create_access_token(identity=user_id),
+            "access_token": create_access_token(identity=user_id, additional_claims=claims),
             "refresh_token": create_refresh_token(identity=user_id)
         }, 200
@@ -8,13 +8,13 @@ Endpoints:
 - GET /feed/<post_id> - Get single post by ID with full details
 """
 
-from flask import request, Response
+from flask import request
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required
 from src.extensions import mongo, limiter
 from src.logger import logger
 from bson import ObjectId
-from src.utils import download_file_from_post
+from src.utils import download_file_from_post, send_gridfs_file, get_user_info, attach_authors
 
 # Namespace
 feed_ns = Namespace("feed", description="Posts feed operations")
@@ -38,6 +38,28 @@ post_response_model = feed_ns.model("PostResponse", {
     "created_at": fields.String(description="Post creation time")
 })
 
+# Fields the feed list and post detail render (keeps any other stored fields off the wire)
+FEED_POST_PROJECTION = {
+    "title": 1, "description": 1, "tech_stack": 1, "github_link": 1, "files": 1,
+    "user_id": 1, "likes_count": 1, "comments_count": 1, "created_at": 1, "updated_at": 1
+}
+
+# Sort options for the feed list
+FEED_SORT_OPTIONS = {
+    'created_at_desc': [("created_at", -1)],
+    'created_at_asc': [("created_at", 1)],
+    'title_asc': [("title", 1)],
+    'title_desc': [("title", -1)]
+}
+
+
+def _format_feed_post(post):
+    """Shape a raw post (with its author attached) for the feed list"""
+    # created_at/updated_at stay datetimes - orjson writes them as ISO 8601
+    post_id = post.pop("_id")
+    return {**post, "id": str(post_id), "user_id": str(post["user_id"])}
+
+
 # ---------- Routes ----------
 @feed_ns.route("")
 class FeedList(Resource):
@@ -77,68 +99,17 @@ class FeedList(Resource):
                     {"description": {"$regex": search_query, "$options": "i"}}
                 ]
             
-            # Sort options
-            sort_options = {
-                'created_at_desc': [("created_at", -1)],
-                'created_at_asc': [("created_at", 1)],
-                'title_asc': [("title", 1)],
-                'title_desc': [("title", -1)]
-            }
-            
-            sort_criteria = sort_options.get(sort, [("created_at", -1)])
+            sort_criteria = FEED_SORT_OPTIONS.get(sort, FEED_SORT_OPTIONS['created_at_desc'])
             
             # Fetch posts first
-            raw_posts = list(mongo.db.posts.find(query).sort(sort_criteria).skip(skip).limit(limit))
+            raw_posts = list(mongo.db.posts.find(query, FEED_POST_PROJECTION).sort(sort_criteria).skip(skip).limit(limit))
             total_posts = mongo.db.posts.count_documents(query)
             
-            # Batch user lookups to avoid N+1 query problem
-            user_ids = []
-            for post in raw_posts:
-                try:
-                    user_id_obj = ObjectId(post["user_id"]) if not isinstance(post["user_id"], ObjectId) else post["user_id"]
-                    if user_id_obj:
-                        user_ids.append(user_id_obj)
-                except:
-                    pass
-            
-            # Fetch all users in one query
-            users_dict = {}
-            if user_ids:
-                users = mongo.db.users.find({"_id": {"$in": user_ids}})
-                for user in users:
-                    users_dict[str(user["_id"])] = user
+            # Batch user lookups to avoid N+1 query problem (served from the user info cache when possible)
+            attach_authors(raw_posts)
             
-            # Process posts and attach user info
-            posts = []
-            for post in raw_posts:
-                # Convert ObjectId and datetime to strings
-                post["id"] = str(post["_id"])
-                user_id_str = str(post["user_id"])
-                post["user_id"] = user_id_str
-                post["created_at"] = post["created_at"].isoformat()
-                
-                # Convert updated_at if exists
-                if "updated_at" in post and post["updated_at"]:
-                    post["updated_at"] = post["updated_at"].isoformat()
-                
-                # Get user information from batch lookup
-                user = users_dict.get(user_id_str)
-                
-                if user:
-                    post["author"] = {
-                        "username": user.get("username", f"User{user_id_str[-4:]}"),
-                        "id": user_id_str
-                    }
-                else:
-                    post["author"] = {
-                        "username": f"User{user_id_str[-4:]}",
-                        "id": user_id_str
-                    }
-                
-                # Remove internal fields
-                del post["_id"]
-                
-                posts.append(post)
+            # Process posts in one pass
+            posts = [_format_feed_post(post) for post in raw_posts]
             
             return {
                 "posts": posts,
@@ -180,26 +151,22 @@ class FeedDetail(Resource):
             if not ObjectId.is_valid(post_id):
                 return {"message": "Invalid post ID format"}, 400
                 
-            post = mongo.db.posts.find_one({"_id": ObjectId(post_id)})
+            post = mongo.db.posts.find_one({"_id": ObjectId(post_id)}, FEED_POST_PROJECTION)
             if not post:
                 return {"message": "Post not found"}, 404
                 
-            # Convert ObjectId and datetime to strings
+            # Convert ObjectId to strings
             post["id"] = str(post["_id"])
             post["user_id"] = str(post["user_id"])
-            post["created_at"] = post["created_at"].isoformat()
-            
-            # Convert updated_at if exists
-            if "updated_at" in post and post["updated_at"]:
-                post["updated_at"] = post["updated_at"].isoformat()
+            # created_at/updated_at stay datetimes - orjson writes them as ISO 8601
             
             # Add author info similar to list endpoint
             try:
-                user = mongo.db.users.find_one({"_id": ObjectId(post["user_id"])})
+                user = get_user_info(post["user_id"])
                 if user:
                     post["author"] = {
                         "username": user.get("username", f"User{str(post['user_id'])[-4:]}"),
-                        "id": str(user["_id"])
+                        "id": user["id"]
                     }
                 else:
                     post["author"] = {
@@ -215,7 +182,7 @@ class FeedDetail(Resource):
             # Get all likes for this post with user information
             likes = []
             for like in mongo.db.likes.find({"post_id": ObjectId(post_id)}).sort("created_at", -1):
-                user = mongo.db.users.find_one({"_id": like["user_id"]})
+                user = mongo.db.users.find_one({"_id": like["user_id"]}, {"username": 1, "email": 1})
                 likes.append({
                     "id": str(like["_id"]),
                     "user": {
@@ -223,18 +190,18 @@ class FeedDetail(Resource):
                         "username": user["username"],
                         "email": user["email"]
                     },
-                    "created_at": like["created_at"].isoformat()
+                    "created_at": like["created_at"]
                 })
             
             # Get all comments for this post with user information and replies
             comments = []
             for comment in mongo.db.comments.find({"post_id": ObjectId(post_id)}).sort("created_at", -1):
-                user = mongo.db.users.find_one({"_id": comment["user_id"]})
+                user = mongo.db.users.find_one({"_id": comment["user_id"]}, {"username": 1, "email": 1})
                 
                 # Get replies for this comment
                 replies = []
                 for reply in mongo.db.replies.find({"comment_id": comment["_id"]}).sort("created_at", -1):
-                    reply_user = mongo.db.users.find_one({"_id": reply["user_id"]})
+                    reply_user = mongo.db.users.find_one({"_id": reply["user_id"]}, {"username": 1, "email": 1})
                     replies.append({
                         "id": str(reply["_id"]),
                         "content": reply["content"],
@@ -245,8 +212,8 @@ class FeedDetail(Resource):
                         },
                         "comment_id": str(reply["comment_id"]),
                         "post_id": str(reply["post_id"]),
-                        "created_at": reply["created_at"].isoformat(),
-                        "updated_at": reply["updated_at"].isoformat()
+                        "created_at": reply["created_at"],
+                        "updated_at": reply["updated_at"]
                     })
                 
                 comments.append({
@@ -260,8 +227,8 @@ class FeedDetail(Resource):
                     "post_id": str(comment["post_id"]),
                     "replies": replies,
                     "replies_count": len(replies),
-                    "created_at": comment["created_at"].isoformat(),
-                    "updated_at": comment["updated_at"].isoformat()
+                    "created_at": comment["created_at"],
+                    "updated_at": comment["updated_at"]
                 })
             
             # Add social data to post
@@ -287,20 +254,13 @@ class FeedFileDownload(Resource):
         """
         try:
             # Use the centralized file download function
-            success, error_msg, file_data, file_info = download_file_from_post(post_id, file_id)
+            success, error_msg, file_obj, file_info = download_file_from_post(post_id, file_id)
             
             if not success:
                 return {"message": error_msg}, 404
             
-            # Return file with appropriate headers
-            return Response(
-                file_data,
-                mimetype=file_info["content_type"],
-                headers={
-                    "Content-Disposition": f"attachment; filename={file_info['filename']}",
-                    "Content-Length": str(len(file_data))
-                }
-            )
+            # Stream the file straight from GridFS
+            return send_gridfs_file(file_obj, file_info["filename"], file_info["content_type"])
             
         except Exception as e:
             logger.error(f"Error in file download endpoint: {str(e)}")
@@ -12,7 +12,18 @@ from flask_restx import Namespace, Resource, fields
 from src.extensions import mongo
 from src.logger import logger
 import redis
-import os
+
+# Redis client for the rate limiting storage check (client and its connection pool are reused across checks)
+_redis_client = None
+
+
+def _get_redis(redis_url):
+    """Get the shared Redis client used for health checks"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.from_url(redis_url, socket_connect_timeout=2, socket_timeout=2)
+    return _redis_client
+
 
 # Namespace
 health_ns = Namespace("health", description="Health check operations")
@@ -118,13 +129,13 @@ class HealthStatus(Resource):
             overall_healthy = False
         
         # Check rate limiting storage (Redis or in-memory)
-        redis_url = os.getenv("RATELIMIT_STORAGE_URL", "memory://")
+        redis_url = app.config.get("RATELIMIT_STORAGE_URL", "memory://")
         storage_type = "Memory"
         message = "Rate limiting active using Memory storage"
         
         if redis_url.startswith(("redis://", "rediss://")):
             try:
-                redis.from_url(redis_url).ping()
+                _get_redis(redis_url).ping()
                 storage_type = "Redis"
                 message = "Rate limiting active using Redis storage"
             except Exception as e:
@@ -15,10 +15,16 @@ from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.extensions import mongo, limiter
 from src.logger import logger
+from src.utils import delete_success, get_documents_by_ids, get_users_info, run_concurrently, get_unread_count, invalidate_unread_count
+from src.utils.pagination import find_newest_first, next_cursor_headers
 from bson import ObjectId
 
 notifications_ns = Namespace("notifications", description="User notifications management")
 
+# Notification list page size and cap (shared by page and cursor mode)
+NOTIFICATIONS_PAGE_SIZE = 20
+NOTIFICATIONS_MAX_PAGE_SIZE = 100
+
 notification_model = notifications_ns.model("Notification", {
     "id": fields.String(description="Notification ID"),
     "type": fields.String(description="Notification type"),
@@ -29,41 +35,60 @@ notification_model = notifications_ns.model("Notification", {
         "email": fields.String(description="Actor email")
     })),
     "post_id": fields.String(description="Related post ID"),
+    "post_title": fields.String(description="Related post title"),
     "comment_id": fields.String(description="Related comment ID"),
     "reply_id": fields.String(description="Related reply ID"),
+    "comment_content": fields.String(description="Related comment or reply content"),
     "read": fields.Boolean(description="Whether notification is read"),
     "created_at": fields.String(description="Creation time (ISO)")
 })
 
 
-def _format_notification(doc):
-    """Normalize notification document for API response"""
+def _load_notification_context(docs):
+    """
+    Batch-load everything a page of notifications references.
+    
+    Actors, post titles and comment/reply contents are each fetched with one
+    query (actors usually from the user info cache), all at the same time.
+    
+    Returns:
+        Tuple of (actors, posts, comments, replies) dicts keyed by ID string
+    """
+    actor_ids = {doc["actor_id"] for doc in docs if doc.get("actor_id")}
+    post_ids = {doc["post_id"] for doc in docs if doc.get("post_id")}
+    comment_ids = {doc["comment_id"] for doc in docs if doc.get("comment_id")}
+    # Reply content is only shown when the notification has no comment_id
+    reply_ids = {doc["reply_id"] for doc in docs if doc.get("reply_id") and not doc.get("comment_id")}
+    
+    return run_concurrently(
+        lambda: get_users_info(actor_ids),
+        lambda: get_documents_by_ids("posts", post_ids, {"title": 1}),
+        lambda: get_documents_by_ids("comments", comment_ids, {"content": 1}),
+        lambda: get_documents_by_ids("replies", reply_ids, {"content": 1})
+    )
+
+
+def _format_notification(doc, context):
+    """Normalize notification document for API response (context from _load_notification_context)"""
     try:
-        actor = None
-        if doc.get("actor_id"):
-            user = mongo.db.users.find_one({"_id": doc["actor_id"]})
-            if user:
-                actor = {
-                    "id": str(user["_id"]),
-                    "username": user.get("username"),
-                    "email": user.get("email")
-                }
+        actors, posts, comments, replies = context
+        actor = actors.get(str(doc["actor_id"])) if doc.get("actor_id") else None
 
-        # Fetch post title if available
+        # Post title if available
         post_title = None
         if doc.get("post_id"):
-            post = mongo.db.posts.find_one({"_id": doc["post_id"]}, {"title": 1})
+            post = posts.get(str(doc["post_id"]))
             if post:
                 post_title = post.get("title")
 
-        # Fetch comment/reply content if available
+        # Comment/reply content if available
         comment_content = None
         if doc.get("comment_id"):
-            comment = mongo.db.comments.find_one({"_id": doc["comment_id"]}, {"content": 1})
+            comment = comments.get(str(doc["comment_id"]))
             if comment:
                 comment_content = comment.get("content")
         elif doc.get("reply_id"):
-            reply = mongo.db.replies.find_one({"_id": doc["reply_id"]}, {"content": 1})
+            reply = replies.get(str(doc["reply_id"]))
             if reply:
                 comment_content = reply.get("content")
 
@@ -83,33 +108,57 @@ def _format_notification(doc):
         return res
     except Exception as e:
         logger.error(f"Failed to format notification: {str(e)}")
-        return {"id": str(doc.get("_id", "")), "type": doc.get("type"), "read": bool(doc.get("read", False))}
+        res = dict.fromkeys(notification_model.keys())
+        res.update({"id": str(doc.get("_id", "")), "type": doc.get("type"), "read": bool(doc.get("read", False))})
+        return res
 
 
 @notifications_ns.route("")
 class NotificationList(Resource):
     @jwt_required()
     @limiter.limit("200 per minute")
-    @notifications_ns.marshal_with(notification_model, as_list=True)
+    @notifications_ns.doc(params={
+        "page": "Page number (default: 1)",
+        "limit": "Notifications per page (default: 20, max: 100)",
+        "cursor": "ID of the last notification from the previous page (X-Next-Cursor header) - replaces page"
+    })
+    @notifications_ns.response(200, "Success", [notification_model])  # rows are built in the response shape, no marshalling pass
+    @notifications_ns.response(400, "Bad Request")
     def get(self):
         """List current user's notifications with pagination (newest first)."""
         try:
             user_id = get_jwt_identity()
-            page = max(int(request.args.get('page', 1)), 1)
-            limit = min(max(int(request.args.get('limit', 20)), 1), 100)
-            skip = (page - 1) * limit
-
             query = {"recipient_id": ObjectId(user_id)}
-            total = mongo.db.notifications.count_documents(query)
-            items = []
-            for doc in mongo.db.notifications.find(query).sort([("created_at", -1)]).skip(skip).limit(limit):
-                items.append(_format_notification(doc))
-
-            return items, 200, {
-                "X-Total-Count": str(total),
-                "X-Page": str(page),
-                "X-Limit": str(limit)
-            }
+            
+            if request.args.get('cursor'):
+                # Keyset pagination: read exactly one page after the cursor (no skip, no total count),
+                # with the same page size and cap as page mode
+                docs, limit, error = find_newest_first(
+                    mongo.db.notifications, query,
+                    default_limit=NOTIFICATIONS_PAGE_SIZE, max_limit=NOTIFICATIONS_MAX_PAGE_SIZE
+                )
+                if error:
+                    return {"message": error}, 400
+                docs = list(docs)
+                headers = {"X-Limit": str(limit)}
+            else:
+                page = max(int(request.args.get('page', 1)), 1)
+                limit = min(max(int(request.args.get('limit', NOTIFICATIONS_PAGE_SIZE)), 1), NOTIFICATIONS_MAX_PAGE_SIZE)
+                skip = (page - 1) * limit
+                
+                total = mongo.db.notifications.count_documents(query)
+                docs = list(mongo.db.notifications.find(query).sort([("created_at", -1), ("_id", -1)]).skip(skip).limit(limit))
+                headers = {
+                    "X-Total-Count": str(total),
+                    "X-Page": str(page),
+                    "X-Limit": str(limit)
+                }
+            
+            # Resolve all referenced users, posts, comments and replies at once
+            context = _load_notification_context(docs)
+            items = [_format_notification(doc, context) for doc in docs]
+
+            return items, 200, {**headers, **next_cursor_headers(items, limit)}
         except Exception as e:
             logger.error(f"Error listing notifications: {str(e)}")
             return {"message": "Internal server error"}, 500
@@ -123,11 +172,8 @@ class UnreadCount(Resource):
         """Get unread notifications count for current user."""
         try:
             user_id = get_jwt_identity()
-            count = mongo.db.notifications.count_documents({
-                "recipient_id": ObjectId(user_id),
-                "read": False
-            })
-            return {"unread": count}, 200
+            # Polled by the navbar badge - served from the Redis cache when possible
+            return {"unread": get_unread_count(user_id)}, 200
         except Exception as e:
             logger.error(f"Error counting unread notifications: {str(e)}")
             return {"message": "Internal server error"}, 500
@@ -145,6 +191,7 @@ class MarkAllRead(Resource):
                 {"recipient_id": ObjectId(user_id), "read": False},
                 {"$set": {"read": True}}
             )
+            invalidate_unread_count(user_id)
             return {"updated": result.modified_count}, 200
         except Exception as e:
             logger.error(f"Error marking all as read: {str(e)}")
@@ -168,6 +215,8 @@ class MarkRead(Resource):
             )
             if result.matched_count == 0:
                 return {"message": "Notification not found"}, 404
+            if result.modified_count:
+                invalidate_unread_count(user_id)
             return {"message": "Marked as read"}, 200
         except Exception as e:
             logger.error(f"Error marking notification as read: {str(e)}")
@@ -190,7 +239,8 @@ class DeleteNotification(Resource):
             })
             if result.deleted_count == 0:
                 return {"message": "Notification not found"}, 404
-            return {"message": "Notification deleted"}, 200
+            invalidate_unread_count(user_id)
+            return delete_success("Notification deleted")
         except Exception as e:
             logger.error(f"Error deleting notification: {str(e)}")
             return {"message": "Internal server error"}, 500
@@ -205,6 +255,7 @@ class ClearAll(Resource):
         try:
             user_id = get_jwt_identity()
             result = mongo.db.notifications.delete_many({"recipient_id": ObjectId(user_id)})
+            invalidate_unread_count(user_id)
             return {"deleted": result.deleted_count}, 200
         except Exception as e:
             logger.error(f"Error clearing notifications: {str(e)}")
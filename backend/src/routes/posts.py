@@ -12,7 +12,7 @@ from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.extensions import mongo, limiter
 from src.logger import logger
-from src.utils import upload_files_to_gridfs
+from src.utils import upload_files_to_gridfs, increment_user_posts_count, invalidate_public_profile, is_valid_github_link
 import datetime
 from bson import ObjectId
 
@@ -102,8 +102,8 @@ class PostCreate(Resource):
                     return {"message": f"Tech stack item {i+1} cannot be empty"}, 400
             
             # Validate GitHub link format if provided
-            if github_link and not github_link.startswith("https://github.com/"):
-                return {"message": "GitHub link must be a valid GitHub repository URL"}, 400
+            if github_link and not is_valid_github_link(github_link):
+                return {"message": "GitHub link must be a valid GitHub repository URL (e.g., https://github.com/username/repo)"}, 400
             
             # Handle file uploads using shared utility
             uploaded_files = []
@@ -131,10 +131,14 @@ class PostCreate(Resource):
             result = mongo.db.posts.insert_one(post)
             logger.info(f"Post created by user {user_id}: {title}")
             
+            # The author's post count changed
+            increment_user_posts_count(user_id)
+            invalidate_public_profile(user_id)
+            
             # Prepare response - convert ObjectId to string
             post["id"] = str(result.inserted_id)
             post["user_id"] = str(post["user_id"])
-            post["created_at"] = post["created_at"].isoformat()
+            # created_at stays a datetime - orjson writes it as ISO 8601
             
             # Remove the original _id field to avoid confusion
             if "_id" in post:
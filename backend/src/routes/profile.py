@@ -15,11 +15,13 @@ from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.extensions import mongo
 from src.logger import logger
+from src.utils import get_user_info, invalidate_user_info, invalidate_post_exists, invalidate_public_profile, run_concurrently
 import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 from werkzeug.security import generate_password_hash, check_password_hash
 import re
-from gridfs import GridFS
 from src.routes.auth import USERNAME_REGEX, EMAIL_REGEX, PASSWORD_REGEX
 
 # Namespace
@@ -64,6 +66,44 @@ post_response_model = profile_ns.model("PostResponse", {
     "updated_at": fields.String(description="Post last update time")
 })
 
+def get_post_stats(user_oid):
+    """
+    Get a user's post count and total likes received in one aggregation.
+    
+    Likes are summed from each post's denormalized likes_count, so the likes
+    collection is never scanned.
+    
+    Args:
+        user_oid: ObjectId of the user
+    
+    Returns:
+        Tuple of (posts_count, likes_received)
+    """
+    stats = next(mongo.db.posts.aggregate([
+        {"$match": {"user_id": user_oid}},
+        {"$group": {"_id": None, "posts_count": {"$sum": 1}, "likes_received": {"$sum": "$likes_count"}}}
+    ]), None)
+    if not stats:
+        return 0, 0
+    return stats["posts_count"], stats["likes_received"]
+
+
+def _bulk_decrement(collection, field, counts):
+    """
+    Decrement a counter field on many documents with a single bulk write.
+    
+    Args:
+        collection: MongoDB collection to update
+        field: Counter field name (e.g. "likes_count")
+        counts: Mapping of document _id to the amount to subtract
+    """
+    if counts:
+        collection.bulk_write(
+            [UpdateOne({"_id": doc_id}, {"$inc": {field: -count}}) for doc_id, count in counts.items()],
+            ordered=False
+        )
+
+
 # ---------- Routes ----------
 @profile_ns.route("")
 class UserProfile(Resource):
@@ -73,21 +113,17 @@ class UserProfile(Resource):
         Get current user's profile information including post count.
         """
         try:
-            user_id = get_jwt_identity()
+            user_oid = ObjectId(get_jwt_identity())
             
-            # Get user information
-            user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+            # Get user information (without the password hash) and count the user's posts
+            # and total likes received across them - independent queries, run concurrently
+            user, (posts_count, likes_received) = run_concurrently(
+                lambda: mongo.db.users.find_one({"_id": user_oid}, {"password": 0}),
+                lambda: get_post_stats(user_oid)
+            )
             if not user:
                 return {"message": "User not found"}, 404
             
-            # Count user's posts
-            posts_count = mongo.db.posts.count_documents({"user_id": ObjectId(user_id)})
-            
-            # Calculate total likes received across all user posts
-            user_posts = mongo.db.posts.find({"user_id": ObjectId(user_id)}, {"_id": 1})
-            post_ids = [post["_id"] for post in user_posts]
-            likes_received = mongo.db.likes.count_documents({"post_id": {"$in": post_ids}})
-            
             # Prepare response
             profile = {
                 "id": str(user["_id"]),
@@ -128,10 +164,8 @@ class UserProfile(Resource):
                     "expected_fields": list(allowed_fields)
                 }, 400
             
-            # Get user information
-            user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
-            if not user:
-                return {"message": "User not found"}, 404
+            # Current username/email (usually cached), so unchanged values skip the uniqueness lookups
+            current = (get_user_info(user_id) or {}) if "username" in data or "email" in data else {}
             
             # Prepare update data
             update_data = {}
@@ -152,10 +186,11 @@ class UserProfile(Resource):
                     return {"message": "Username cannot be empty"}, 400
                 if not re.match(USERNAME_REGEX, username):
                     return {"message": "Username must be at least 3 characters and alphanumeric only"}, 400
-                # Check if username is taken by another user
-                existing_user = mongo.db.users.find_one({"username": username, "_id": {"$ne": ObjectId(user_id)}})
-                if existing_user:
-                    return {"message": "Username already taken"}, 400
+                # Check if username is taken by another user (only when it actually changes)
+                if username != current.get("username"):
+                    existing_user = mongo.db.users.count_documents({"username": username, "_id": {"$ne": ObjectId(user_id)}}, limit=1)
+                    if existing_user:
+                        return {"message": "Username already taken"}, 400
                 update_data["username"] = username
             
             # Update email if provided
@@ -165,10 +200,11 @@ class UserProfile(Resource):
                     return {"message": "Email cannot be empty"}, 400
                 if not re.match(EMAIL_REGEX, email):
                     return {"message": "Invalid email format"}, 400
-                # Check if email is taken by another user
-                existing_user = mongo.db.users.find_one({"email": email, "_id": {"$ne": ObjectId(user_id)}})
-                if existing_user:
-                    return {"message": "Email already in use"}, 400
+                # Check if email is taken by another user (only when it actually changes)
+                if email != current.get("email"):
+                    existing_user = mongo.db.users.count_documents({"email": email, "_id": {"$ne": ObjectId(user_id)}}, limit=1)
+                    if existing_user:
+                        return {"message": "Email already in use"}, 400
                 update_data["email"] = email
             
             # Update bio if provided
@@ -180,18 +216,35 @@ class UserProfile(Resource):
             
             # Update the user document
             if update_data:
-                mongo.db.users.update_one(
-                    {"_id": ObjectId(user_id)},
-                    {"$set": update_data}
-                )
+                # Apply the update and get the updated profile back in one round trip
+                # (no separate existence read), alongside the independent post stats
+                # The unique indexes still guard a value taken since the (possibly cached) check
+                user_oid = ObjectId(user_id)
+                try:
+                    updated_user, (posts_count, likes_received) = run_concurrently(
+                        lambda: mongo.db.users.find_one_and_update(
+                            {"_id": user_oid},
+                            {"$set": update_data},
+                            projection={"password": 0},
+                            return_document=ReturnDocument.AFTER
+                        ),
+                        lambda: get_post_stats(user_oid)
+                    )
+                except DuplicateKeyError as e:
+                    if "email" in (e.details or {}).get("keyPattern", {}):
+                        return {"message": "Email already in use"}, 400
+                    return {"message": "Username already taken"}, 400
+                if not updated_user:
+                    return {"message": "User not found"}, 404
                 logger.info(f"Profile updated for user {user_id}")
                 
-                # Return updated profile
-                updated_user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
-                posts_count = mongo.db.posts.count_documents({"user_id": ObjectId(user_id)})
-                user_posts = mongo.db.posts.find({"user_id": ObjectId(user_id)}, {"_id": 1})
-                post_ids = [post["_id"] for post in user_posts]
-                likes_received = mongo.db.likes.count_documents({"post_id": {"$in": post_ids}})
+                # Refresh cached display info so new content shows the new username right away
+                invalidate_user_info(user_id, {
+                    "id": str(updated_user["_id"]),
+                    "username": updated_user["username"],
+                    "email": updated_user["email"]
+                })
+                invalidate_public_profile(user_id)
                 
                 profile = {
                     "id": str(updated_user["_id"]),
@@ -245,7 +298,7 @@ class ChangePassword(Resource):
                 return {"message": "All password fields are required"}, 400
             
             # Get user
-            user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+            user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"password": 1})
             if not user:
                 return {"message": "User not found"}, 404
             
@@ -303,7 +356,7 @@ class DeleteAccount(Resource):
                 return {"message": "Password is required to delete account"}, 400
             
             # Get user and verify password
-            user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+            user = mongo.db.users.find_one({"_id": ObjectId(user_id)}, {"password": 1})
             if not user:
                 return {"message": "User not found"}, 404
             
@@ -314,11 +367,10 @@ class DeleteAccount(Resource):
             user_oid = ObjectId(user_id)
             
             # Get all user's posts for cascade deletion
-            user_posts = list(mongo.db.posts.find({"user_id": user_oid}))
+            user_posts = list(mongo.db.posts.find({"user_id": user_oid}, {"files.file_id": 1}))
             post_ids = [post["_id"] for post in user_posts]
             
             # Collect all file IDs from user's posts for GridFS deletion
-            fs = GridFS(mongo.db)
             file_ids_to_delete = []
             for post in user_posts:
                 for file_info in post.get("files", []):
@@ -328,12 +380,14 @@ class DeleteAccount(Resource):
             
             # ===== CASCADE DELETE ALL RELATED DATA =====
             
-            # 0. Delete all files from GridFS
-            for file_id in file_ids_to_delete:
+            # 0. Delete all files from GridFS with one query per GridFS collection
+            # (metadata first, then chunks - the same order GridFS.delete uses)
+            if file_ids_to_delete:
                 try:
-                    fs.delete(file_id)
+                    mongo.db.fs.files.delete_many({"_id": {"$in": file_ids_to_delete}})
+                    mongo.db.fs.chunks.delete_many({"files_id": {"$in": file_ids_to_delete}})
                 except Exception as e:
-                    logger.warning(f"Failed to delete GridFS file {file_id}: {str(e)}")
+                    logger.warning(f"Failed to delete GridFS files {file_ids_to_delete}: {str(e)}")
             
             # 1. Delete all likes on user's posts (and update counts)
             if post_ids:
@@ -345,11 +399,11 @@ class DeleteAccount(Resource):
                 )
             
             # 2. Get all comments on user's posts
-            comments_on_user_posts = list(mongo.db.comments.find({"post_id": {"$in": post_ids}})) if post_ids else []
+            comments_on_user_posts = list(mongo.db.comments.find({"post_id": {"$in": post_ids}}, {"_id": 1})) if post_ids else []
             comment_ids_on_user_posts = [comment["_id"] for comment in comments_on_user_posts]
             
             # 3. Get all comments made by user (on others' posts)
-            user_comments = list(mongo.db.comments.find({"user_id": user_oid}))
+            user_comments = list(mongo.db.comments.find({"user_id": user_oid}, {"post_id": 1}))
             user_comment_ids = [comment["_id"] for comment in user_comments]
             
             # Track posts that need comments_count updates (from user's comments)
@@ -365,7 +419,7 @@ class DeleteAccount(Resource):
             
             # 4. Delete all comment likes (on user's comments and comments on user's posts)
             # First, get comment likes made by user to update counts
-            user_comment_likes = list(mongo.db.comment_likes.find({"user_id": user_oid}))
+            user_comment_likes = list(mongo.db.comment_likes.find({"user_id": user_oid}, {"comment_id": 1}))
             comments_needing_like_update = {}
             for like in user_comment_likes:
                 comment_id = like["comment_id"]
@@ -378,18 +432,14 @@ class DeleteAccount(Resource):
                 mongo.db.comment_likes.delete_many({"comment_id": {"$in": all_comment_ids}})
             
             # Update likes_count on comments that user liked
-            for comment_id, count in comments_needing_like_update.items():
-                mongo.db.comments.update_one(
-                    {"_id": comment_id},
-                    {"$inc": {"likes_count": -count}}
-                )
+            _bulk_decrement(mongo.db.comments, "likes_count", comments_needing_like_update)
             
             # 5. Get all replies to comments (both on user's posts and user's comments)
-            replies_to_comments = list(mongo.db.replies.find({"comment_id": {"$in": all_comment_ids}})) if all_comment_ids else []
+            replies_to_comments = list(mongo.db.replies.find({"comment_id": {"$in": all_comment_ids}}, {"comment_id": 1, "post_id": 1})) if all_comment_ids else []
             reply_ids_to_comments = [reply["_id"] for reply in replies_to_comments]
             
             # 6. Get all replies made by user
-            user_replies = list(mongo.db.replies.find({"user_id": user_oid}))
+            user_replies = list(mongo.db.replies.find({"user_id": user_oid}, {"comment_id": 1, "post_id": 1}))
             user_reply_ids = [reply["_id"] for reply in user_replies]
             
             # Track comments and posts that need replies_count/comments_count updates
@@ -410,7 +460,7 @@ class DeleteAccount(Resource):
             
             # 7. Delete all reply likes
             # First, get reply likes made by user to update counts
-            user_reply_likes = list(mongo.db.reply_likes.find({"user_id": user_oid}))
+            user_reply_likes = list(mongo.db.reply_likes.find({"user_id": user_oid}, {"reply_id": 1}))
             replies_needing_like_update = {}
             for like in user_reply_likes:
                 reply_id = like["reply_id"]
@@ -422,29 +472,17 @@ class DeleteAccount(Resource):
                 mongo.db.reply_likes.delete_many({"reply_id": {"$in": all_reply_ids}})
             
             # Update likes_count on replies that user liked
-            for reply_id, count in replies_needing_like_update.items():
-                mongo.db.replies.update_one(
-                    {"_id": reply_id},
-                    {"$inc": {"likes_count": -count}}
-                )
+            _bulk_decrement(mongo.db.replies, "likes_count", replies_needing_like_update)
             
             # 8. Delete all replies
             if all_reply_ids:
                 mongo.db.replies.delete_many({"_id": {"$in": all_reply_ids}})
             
             # Update replies_count on comments that had user's replies
-            for comment_id, count in comments_needing_reply_update.items():
-                mongo.db.comments.update_one(
-                    {"_id": comment_id},
-                    {"$inc": {"replies_count": -count}}
-                )
+            _bulk_decrement(mongo.db.comments, "replies_count", comments_needing_reply_update)
             
             # Update comments_count on posts that had user's replies
-            for post_id, count in posts_needing_reply_update.items():
-                mongo.db.posts.update_one(
-                    {"_id": post_id},
-                    {"$inc": {"comments_count": -count}}
-                )
+            _bulk_decrement(mongo.db.posts, "comments_count", posts_needing_reply_update)
             
             # 9. Update comments_count on posts that had user's comments
             # Need to do this BEFORE deleting comments to count replies correctly
@@ -463,19 +501,10 @@ class DeleteAccount(Resource):
                 posts_with_replies_to_user_comments[post_id] += 1
             
             # Update posts for user's comments (1 per comment)
-            for comment in user_comments:
-                post_id = comment["post_id"]
-                mongo.db.posts.update_one(
-                    {"_id": post_id},
-                    {"$inc": {"comments_count": -1}}  # Subtract 1 for the comment
-                )
+            _bulk_decrement(mongo.db.posts, "comments_count", posts_needing_comment_update)
             
             # Update posts for replies to user's comments (made by others)
-            for post_id, count in posts_with_replies_to_user_comments.items():
-                mongo.db.posts.update_one(
-                    {"_id": post_id},
-                    {"$inc": {"comments_count": -count}}
-                )
+            _bulk_decrement(mongo.db.posts, "comments_count", posts_with_replies_to_user_comments)
             
             # Now delete all comments
             if all_comment_ids:
@@ -503,7 +532,7 @@ class DeleteAccount(Resource):
             mongo.db.notifications.delete_many(notification_query)
             
             # 11. Delete all likes given by user (on other users' posts) and update counts
-            user_likes = list(mongo.db.likes.find({"user_id": user_oid}))
+            user_likes = list(mongo.db.likes.find({"user_id": user_oid}, {"post_id": 1}))
             posts_needing_like_update = {}
             for like in user_likes:
                 post_id = like["post_id"]
@@ -514,14 +543,11 @@ class DeleteAccount(Resource):
             mongo.db.likes.delete_many({"user_id": user_oid})
             
             # Update likes_count on posts that user liked
-            for post_id, count in posts_needing_like_update.items():
-                mongo.db.posts.update_one(
-                    {"_id": post_id},
-                    {"$inc": {"likes_count": -count}}
-                )
+            _bulk_decrement(mongo.db.posts, "likes_count", posts_needing_like_update)
             
             # 12. Delete all posts
             if post_ids:
+                invalidate_post_exists(*post_ids)
                 posts_deleted_result = mongo.db.posts.delete_many({"_id": {"$in": post_ids}})
                 logger.info(f"Deleted {posts_deleted_result.deleted_count} posts for user {user_id}")
                 if posts_deleted_result.deleted_count != len(post_ids):
@@ -531,6 +557,8 @@ class DeleteAccount(Resource):
             
             # 13. Finally, delete the user account
             result = mongo.db.users.delete_one({"_id": user_oid})
+            invalidate_user_info(user_id)
+            invalidate_public_profile(user_id)
             
             if result.deleted_count == 0:
                 logger.error(f"Failed to delete user account {user_id} - user not found or already deleted")
@@ -539,7 +567,7 @@ class DeleteAccount(Resource):
             logger.info(f"Account {user_id} deleted successfully - removed {len(file_ids_to_delete)} files, {len(post_ids)} posts, {len(all_comment_ids)} comments, {len(all_reply_ids)} replies, and all associated data")
             
             # Verify deletion by checking if user still exists
-            verify_user = mongo.db.users.find_one({"_id": user_oid})
+            verify_user = mongo.db.users.count_documents({"_id": user_oid}, limit=1)
             if verify_user:
                 logger.error(f"CRITICAL: User {user_id} still exists after deletion attempt!")
                 return {"message": "Account deletion may have failed - user still exists"}, 500
@@ -13,17 +13,192 @@ Endpoints:
 - GET /profile/users/<user_id>/posts - Get any user's posts (with pagination)
 """
 
-from flask import request, Response
+from flask import request
 from flask_restx import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.extensions import mongo
 from src.logger import logger
-from src.utils import upload_files_to_gridfs, get_file_from_gridfs
+from src.utils import to_object_id, is_valid_github_link, upload_files_to_gridfs, get_file_from_gridfs, send_gridfs_file, delete_success, run_concurrently, run_in_background, invalidate_post_exists, get_user_info, get_users_info, get_user_posts_count, increment_user_posts_count, attach_authors, get_cached_public_profile, cache_public_profile, invalidate_public_profile
+from src.utils.pagination import find_newest_first, next_cursor_headers
 import datetime
+import threading
+import time
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 # Import the shared namespace and models from profile.py
-from .profile import profile_ns, post_edit_model, post_response_model
+from .profile import profile_ns, post_edit_model, post_response_model, get_post_stats
+
+# Fields the post detail renders for comments and replies
+POST_DETAIL_COMMENT_PROJECTION = {"user_id": 1, "post_id": 1, "content": 1, "created_at": 1, "updated_at": 1}
+POST_DETAIL_REPLY_PROJECTION = {**POST_DETAIL_COMMENT_PROJECTION, "comment_id": 1}
+
+# Post edit limits (same as post creation)
+TITLE_MAX_LENGTH = 200
+DESCRIPTION_MAX_LENGTH = 2000
+TECH_STACK_MAX_ITEMS = 20
+
+# Sort options for profile post lists (_id breaks created_at ties so pages line up with cursors)
+POST_SORT_OPTIONS = {
+    'created_at_desc': [("created_at", -1), ("_id", -1)],
+    'created_at_asc': [("created_at", 1)],
+    'title_asc': [("title", 1)],
+    'title_desc': [("title", -1)],
+    'updated_at_desc': [("updated_at", -1)]
+}
+
+# Profile post list page size and cap (shared by page and cursor mode)
+POSTS_PAGE_SIZE = 10
+POSTS_MAX_PAGE_SIZE = 50
+
+# Owned posts' file lists, reused by a burst of downloads from the same post (dropped
+# on edit/delete in this process; other workers may serve a list up to the TTL old)
+OWNED_POST_CACHE_TTL = 5
+OWNED_POST_CACHE_SIZE = 10000
+_owned_post_cache = {}
+_owned_post_lock = threading.Lock()
+
+
+def _get_owned_post_files(post_oid, user_oid):
+    """
+    Get the file list of a post if it belongs to the user.
+    
+    Returns:
+        List of file info dicts, or None if the post is missing or owned by someone else
+    """
+    cached = _owned_post_cache.get(post_oid)
+    if cached and cached[0] > time.monotonic():
+        return cached[2] if cached[1] == user_oid else None
+    
+    post = mongo.db.posts.find_one({"_id": post_oid, "user_id": user_oid}, {"files": 1})
+    if not post:
+        return None
+    
+    files = post.get("files", [])
+    with _owned_post_lock:
+        if len(_owned_post_cache) >= OWNED_POST_CACHE_SIZE:
+            _owned_post_cache.pop(next(iter(_owned_post_cache)), None)
+        _owned_post_cache[post_oid] = (time.monotonic() + OWNED_POST_CACHE_TTL, user_oid, files)
+    return files
+
+
+def _invalidate_owned_post(post_oid):
+    """Forget a post's cached file list (call when the post is edited or deleted)"""
+    with _owned_post_lock:
+        _owned_post_cache.pop(post_oid, None)
+
+
+def _cascade_delete_post(post_oid):
+    """Delete all data that depends on a deleted post"""
+    # Every dependent document (likes, comments, replies, comment/reply likes,
+    # notifications) carries the post_id, so no comment or reply IDs need to be
+    # collected first and the deletes are independent - run them concurrently
+    (
+        likes_deleted,
+        comment_likes_deleted,
+        reply_likes_deleted,
+        replies_deleted,
+        comments_deleted,
+        notifications_deleted
+    ) = run_concurrently(
+        lambda: mongo.db.likes.delete_many({"post_id": post_oid}),
+        lambda: mongo.db.comment_likes.delete_many({"post_id": post_oid}),
+        lambda: mongo.db.reply_likes.delete_many({"post_id": post_oid}),
+        lambda: mongo.db.replies.delete_many({"post_id": post_oid}),
+        lambda: mongo.db.comments.delete_many({"post_id": post_oid}),
+        lambda: mongo.db.notifications.delete_many({"post_id": post_oid})
+    )
+    logger.info(f"Cascade cleanup completed for post {post_oid} - removed {likes_deleted.deleted_count} post likes, {comments_deleted.deleted_count} comments, {replies_deleted.deleted_count} replies, {comment_likes_deleted.deleted_count} comment likes, {reply_likes_deleted.deleted_count} reply likes and {notifications_deleted.deleted_count} notifications")
+
+
+def _load_post_detail(post_oid, user_oid):
+    """
+    Load an owned post with its likes, comments, replies and their authors.
+
+    Likes, comments and replies are read as separate newest-first cursors (run
+    concurrently, projected to the rendered fields) instead of being embedded in
+    one document, so a busy post cannot hit MongoDB's 16MB document limit. All
+    authors are then resolved with one batched, cached get_users_info call.
+
+    Returns:
+        The post document with `likes`, `comments`, `replies` lists and a
+        `participants` dict (user ID string -> user info) attached, or None if
+        the user does not own it
+    """
+    post = mongo.db.posts.find_one({"_id": post_oid, "user_id": user_oid})
+    if not post:
+        return None
+
+    newest_first = [("created_at", -1), ("_id", -1)]
+    post["likes"], post["comments"], post["replies"] = run_concurrently(
+        lambda: list(mongo.db.likes.find({"post_id": post_oid}, {"user_id": 1, "created_at": 1}).sort(newest_first)),
+        lambda: list(mongo.db.comments.find({"post_id": post_oid}, POST_DETAIL_COMMENT_PROJECTION).sort(newest_first)),
+        lambda: list(mongo.db.replies.find({"post_id": post_oid}, POST_DETAIL_REPLY_PROJECTION).sort(newest_first))
+    )
+    post["participants"] = get_users_info({
+        doc["user_id"] for doc in post["likes"] + post["comments"] + post["replies"]
+    })
+    return post
+
+
+def _list_user_posts(user_oid):
+    """
+    List one user's posts for the profile endpoints (page/limit/sort, or keyset cursor).
+    
+    Returns:
+        Tuple of (body, status code, headers)
+    """
+    query = {"user_id": user_oid}
+    
+    if request.args.get('cursor'):
+        # Keyset pagination: read exactly one page after the cursor (no skip, no total count),
+        # with the same page size and cap as page mode
+        raw_posts, limit, error = find_newest_first(
+            mongo.db.posts, query, default_limit=POSTS_PAGE_SIZE, max_limit=POSTS_MAX_PAGE_SIZE
+        )
+        if error:
+            return {"message": error}, 400, {}
+        raw_posts = list(raw_posts)
+        sort = 'created_at_desc'
+        pagination = {"limit": limit}
+    else:
+        try:
+            page = max(int(request.args.get('page', 1)), 1)
+            limit = min(max(int(request.args.get('limit', POSTS_PAGE_SIZE)), 1), POSTS_MAX_PAGE_SIZE)
+        except ValueError:
+            return {"message": "Invalid page or limit"}, 400, {}
+        sort = request.args.get('sort', 'created_at_desc')
+        
+        skip = (page - 1) * limit
+        
+        sort_criteria = POST_SORT_OPTIONS.get(sort, POST_SORT_OPTIONS['created_at_desc'])
+        
+        # Total comes from the counter on the user document (no per-page count scan)
+        total_posts, raw_posts = run_concurrently(
+            lambda: get_user_posts_count(user_oid),
+            lambda: list(mongo.db.posts.find(query).sort(sort_criteria).skip(skip).limit(limit))
+        )
+        pagination = {
+            "page": page,
+            "limit": limit,
+            "total": total_posts,
+            "pages": (total_posts + limit - 1) // limit
+        }
+    
+    # Author lookup (one batched, cached lookup instead of N+1)
+    attach_authors(raw_posts)
+    
+    posts = []
+    for post in raw_posts:
+        # Convert ObjectId to string
+        post["id"] = str(post.pop("_id"))
+        post["user_id"] = str(post["user_id"])
+        # created_at/updated_at stay datetimes - orjson writes them as ISO 8601
+        posts.append(post)
+    
+    # Only newest-first listings can be continued with a cursor
+    headers = next_cursor_headers(posts, limit) if sort == 'created_at_desc' else {}
+    return {"posts": posts, "pagination": pagination, "sort": sort}, 200, headers
 
 
 # ---------- Routes ----------
@@ -38,73 +213,13 @@ class UserPosts(Resource):
         - page: Page number (default: 1)
         - limit: Posts per page (default: 10, max: 50)
         - sort: Sort order (default: created_at_desc)
+        - cursor: Post ID to continue after, newest first (optional - replaces page/sort)
+        
+        For newest-first listings the cursor for the next page is returned in the X-Next-Cursor header.
         """
         try:
             user_id = get_jwt_identity()
-            page = int(request.args.get('page', 1))
-            limit = min(int(request.args.get('limit', 10)), 50)
-            sort = request.args.get('sort', 'created_at_desc')
-            
-            skip = (page - 1) * limit
-            
-            # Sort options
-            sort_options = {
-                'created_at_desc': [("created_at", -1)],
-                'created_at_asc': [("created_at", 1)],
-                'title_asc': [("title", 1)],
-                'title_desc': [("title", -1)],
-                'updated_at_desc': [("updated_at", -1)]
-            }
-            
-            sort_criteria = sort_options.get(sort, [("created_at", -1)])
-            
-            posts = []
-            total_posts = mongo.db.posts.count_documents({"user_id": ObjectId(user_id)})
-            
-            # Fetch posts first
-            raw_posts = list(mongo.db.posts.find({"user_id": ObjectId(user_id)}).sort(sort_criteria).skip(skip).limit(limit))
-            
-            # Batch user lookup (single query instead of N+1)
-            user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
-            user_id_str = str(user_id)
-            
-            # Process posts and attach user info
-            posts = []
-            for post in raw_posts:
-                # Convert ObjectId to string
-                post["id"] = str(post["_id"])
-                post["user_id"] = user_id_str
-                
-                post["created_at"] = post["created_at"].isoformat()
-                if "updated_at" in post:
-                    post["updated_at"] = post["updated_at"].isoformat()
-                
-                # Use pre-fetched user information
-                if user:
-                    post["author"] = {
-                        "username": user.get("username", f"User{user_id_str[-4:]}"),
-                        "id": user_id_str
-                    }
-                else:
-                    post["author"] = {
-                        "username": f"User{user_id_str[-4:]}",
-                        "id": user_id_str
-                    }
-                
-                # Remove the _id field to avoid confusion
-                del post["_id"]
-                posts.append(post)
-            
-            return {
-                "posts": posts,
-                "pagination": {
-                    "page": page,
-                    "limit": limit,
-                    "total": total_posts,
-                    "pages": (total_posts + limit - 1) // limit
-                },
-                "sort": sort
-            }, 200
+            return _list_user_posts(ObjectId(user_id))
             
         except Exception as e:
             logger.error(f"Error fetching user posts: {str(e)}")
@@ -121,16 +236,14 @@ class UserPostDetail(Resource):
         Only returns posts that belong to the current user.
         """
         try:
-            if not ObjectId.is_valid(post_id):
+            post_oid = to_object_id(post_id)
+            if post_oid is None:
                 return {"message": "Invalid post ID format"}, 400
                 
             user_id = get_jwt_identity()
             
-            # Find post that belongs to user
-            post = mongo.db.posts.find_one({
-                "_id": ObjectId(post_id),
-                "user_id": ObjectId(user_id)
-            })
+            # Find post that belongs to user, together with its social data
+            post = _load_post_detail(post_oid, ObjectId(user_id))
             
             if not post:
                 return {"message": "Post not found or you don't have permission to view it"}, 404
@@ -138,61 +251,51 @@ class UserPostDetail(Resource):
             # Prepare response
             post["id"] = str(post["_id"])
             post["user_id"] = str(post["user_id"])
-            post["created_at"] = post["created_at"].isoformat()
+            # created_at/updated_at stay datetimes - orjson writes them as ISO 8601
             
-            if "updated_at" in post:
-                post["updated_at"] = post["updated_at"].isoformat()
+            users = post.pop("participants")
             
-            # Get all likes for this post with user information
-            likes = []
-            for like in mongo.db.likes.find({"post_id": ObjectId(post_id)}).sort("created_at", -1):
-                user = mongo.db.users.find_one({"_id": like["user_id"]})
-                likes.append({
+            # Likes with user information (rows whose user no longer exists are skipped)
+            likes = [
+                {
                     "id": str(like["_id"]),
-                    "user": {
-                        "id": str(user["_id"]),
-                        "username": user["username"],
-                        "email": user["email"]
-                    },
-                    "created_at": like["created_at"].isoformat()
+                    "user": users[str(like["user_id"])],
+                    "created_at": like["created_at"]
+                }
+                for like in post.pop("likes")
+                if str(like["user_id"]) in users
+            ]
+            
+            # Group replies under their comment
+            replies_by_comment = {}
+            for reply in post.pop("replies"):
+                if str(reply["user_id"]) not in users:
+                    continue
+                replies_by_comment.setdefault(reply["comment_id"], []).append({
+                    "id": str(reply["_id"]),
+                    "content": reply["content"],
+                    "user": users[str(reply["user_id"])],
+                    "comment_id": str(reply["comment_id"]),
+                    "post_id": str(reply["post_id"]),
+                    "created_at": reply["created_at"],
+                    "updated_at": reply["updated_at"]
                 })
             
-            # Get all comments for this post with user information and replies
+            # Comments with user information and replies
             comments = []
-            for comment in mongo.db.comments.find({"post_id": ObjectId(post_id)}).sort("created_at", -1):
-                user = mongo.db.users.find_one({"_id": comment["user_id"]})
-                
-                # Get replies for this comment
-                replies = []
-                for reply in mongo.db.replies.find({"comment_id": comment["_id"]}).sort("created_at", -1):
-                    reply_user = mongo.db.users.find_one({"_id": reply["user_id"]})
-                    replies.append({
-                        "id": str(reply["_id"]),
-                        "content": reply["content"],
-                        "user": {
-                            "id": str(reply_user["_id"]),
-                            "username": reply_user["username"],
-                            "email": reply_user["email"]
-                        },
-                        "comment_id": str(reply["comment_id"]),
-                        "post_id": str(reply["post_id"]),
-                        "created_at": reply["created_at"].isoformat(),
-                        "updated_at": reply["updated_at"].isoformat()
-                    })
-                
+            for comment in post.pop("comments"):
+                if str(comment["user_id"]) not in users:
+                    continue
+                replies = replies_by_comment.get(comment["_id"], [])
                 comments.append({
                     "id": str(comment["_id"]),
                     "content": comment["content"],
-                    "user": {
-                        "id": str(user["_id"]),
-                        "username": user["username"],
-                        "email": user["email"]
-                    },
+                    "user": users[str(comment["user_id"])],
                     "post_id": str(comment["post_id"]),
                     "replies": replies,
                     "replies_count": len(replies),
-                    "created_at": comment["created_at"].isoformat(),
-                    "updated_at": comment["updated_at"].isoformat()
+                    "created_at": comment["created_at"],
+                    "updated_at": comment["updated_at"]
                 })
             
             # Add social data to post
@@ -223,19 +326,12 @@ class UserPostDetail(Resource):
         - All validations from post creation apply
         """
         try:
-            if not ObjectId.is_valid(post_id):
+            post_oid = to_object_id(post_id)
+            if post_oid is None:
                 return {"message": "Invalid post ID format"}, 400
                 
             user_id = get_jwt_identity()
-            
-            # Check if post exists and belongs to user
-            post = mongo.db.posts.find_one({
-                "_id": ObjectId(post_id),
-                "user_id": ObjectId(user_id)
-            })
-            
-            if not post:
-                return {"message": "Post not found or you don't have permission to edit it"}, 404
+            user_oid = ObjectId(user_id)
             
             # Get form data
             title = request.form.get("title", "").strip()
@@ -249,14 +345,14 @@ class UserPostDetail(Resource):
             
             # Update title if provided
             if title:
-                if len(title) > 200:
-                    return {"message": "Title must be 200 characters or less"}, 400
+                if len(title) > TITLE_MAX_LENGTH:
+                    return {"message": f"Title must be {TITLE_MAX_LENGTH} characters or less"}, 400
                 update_data["title"] = title
             
             # Update description if provided
             if description:
-                if len(description) > 2000:
-                    return {"message": "Description must be 2000 characters or less"}, 400
+                if len(description) > DESCRIPTION_MAX_LENGTH:
+                    return {"message": f"Description must be {DESCRIPTION_MAX_LENGTH} characters or less"}, 400
                 update_data["description"] = description
             
             # Update tech_stack if provided
@@ -267,24 +363,38 @@ class UserPostDetail(Resource):
                     if not tech or not tech.strip():
                         return {"message": f"Tech stack item at index {i} must be a non-empty string"}, 400
                         
-                if len(tech_stack) > 20:
-                    return {"message": "Tech stack cannot have more than 20 technologies"}, 400
+                if len(tech_stack) > TECH_STACK_MAX_ITEMS:
+                    return {"message": f"Tech stack cannot have more than {TECH_STACK_MAX_ITEMS} technologies"}, 400
                     
                 update_data["tech_stack"] = tech_stack
             
             # Update GitHub link if provided
             if github_link:
-                if not github_link.startswith("https://github.com/"):
-                    return {"message": "GitHub link must be a valid GitHub repository URL (https://github.com/...)"}, 400
-                    
-                if len(github_link.split('/')) < 5:
-                    return {"message": "GitHub link must include repository path (e.g., https://github.com/username/repo)"}, 400
+                # Same rule as post creation; a link saved before that rule existed can be resent unchanged
+                if not is_valid_github_link(github_link) and not mongo.db.posts.count_documents(
+                    {"_id": post_oid, "github_link": github_link}, limit=1
+                ):
+                    return {"message": "GitHub link must be a valid GitHub repository URL (e.g., https://github.com/username/repo)"}, 400
                 update_data["github_link"] = github_link
             # Handle file removal and new file uploads
-            current_files = post.get("files", [])
-            files_to_keep = current_files
+            uploads = [f for f in request.files.getlist('files') if f.filename and f.filename.strip()]
+            files_to_keep = []
             new_files = []
             
+            if 'existing_files' in request.form or uploads:
+                # Only file changes need the current file list; this also checks ownership
+                # before anything is uploaded
+                post = mongo.db.posts.find_one({
+                    "_id": post_oid,
+                    "user_id": user_oid
+                }, {"files": 1})
+                
+                if not post:
+                    return {"message": "Post not found or you don't have permission to edit it"}, 404
+                
+                current_files = post.get("files", [])
+                files_to_keep = current_files
+            
             if 'existing_files' in request.form:
                 # Get list of file IDs to keep, filter out empty strings
                 existing_files_to_keep = request.form.getlist('existing_files')
@@ -294,46 +404,44 @@ class UserPostDetail(Resource):
                 files_to_keep = [f for f in current_files if f["file_id"] in existing_files_to_keep]
                 update_data["files"] = files_to_keep + new_files
             
-            # Handle new file uploads
-            if 'files' in request.files:
-                files = request.files.getlist('files')
+            # Handle new file uploads (only files with names count)
+            if uploads:
+                success, error_msg, uploaded_files = upload_files_to_gridfs(request.files.getlist('files'), user_id, max_files=10)
+                if not success:
+                    return {"message": error_msg}, 400
                 
-                # Check if there are actual files with names
-                if files and any(f.filename and f.filename.strip() for f in files):
-                    success, error_msg, uploaded_files = upload_files_to_gridfs(files, user_id, max_files=10)
-                    if not success:
-                        return {"message": error_msg}, 400
-                    
-                    new_files = uploaded_files
-                    update_data["files"] = files_to_keep + new_files
-            
-            # Add updated timestamp
-            update_data["updated_at"] = datetime.datetime.utcnow()
+                new_files = uploaded_files
+                update_data["files"] = files_to_keep + new_files
             
-            # Update the post
+            # Nothing to change - skip the write entirely
             if update_data:
-                result = mongo.db.posts.update_one(
-                    {"_id": ObjectId(post_id)},
-                    {"$set": update_data}
+                # Add updated timestamp
+                update_data["updated_at"] = datetime.datetime.utcnow()
+                
+                # Update the post only if it belongs to the user and get the updated
+                # document back in the same round trip
+                updated_post = mongo.db.posts.find_one_and_update(
+                    {"_id": post_oid, "user_id": user_oid},
+                    {"$set": update_data},
+                    return_document=ReturnDocument.AFTER
                 )
                 
-                # Check if any data was actually changed (not just timestamp)
-                if result.modified_count == 0 and len(update_data) > 1:
-                    return {"message": "No changes made to the post"}, 400
+                if not updated_post:
+                    return {"message": "Post not found or you don't have permission to edit it"}, 404
+                _invalidate_owned_post(updated_post["_id"])
                 
                 logger.info(f"Post {post_id} updated by user {user_id}")
                 
                 # Return updated post (strip non-serializable fields)
-                updated_post = mongo.db.posts.find_one({"_id": ObjectId(post_id)})
                 updated_post["id"] = str(updated_post["_id"])
                 updated_post["user_id"] = str(updated_post["user_id"])
                 
                 # Get user information for this post
-                user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+                user = get_user_info(user_id)
                 if user:
                     updated_post["author"] = {
                         "username": user.get("username", f"User{str(updated_post['user_id'])[-4:]}"),
-                        "id": str(user["_id"])
+                        "id": user["id"]
                     }
                 else:
                     updated_post["author"] = {
@@ -370,62 +478,34 @@ class UserPostDetail(Resource):
         All uploaded files remain in storage.
         """
         try:
-            if not ObjectId.is_valid(post_id):
+            post_oid = to_object_id(post_id)
+            if post_oid is None:
                 return {"message": "Invalid post ID format"}, 400
                 
             user_id = get_jwt_identity()
             
-            # Check if post exists and belongs to user
-            post = mongo.db.posts.find_one({
-                "_id": ObjectId(post_id),
+            # Stop treating the post as existing before it is removed
+            invalidate_post_exists(post_id)
+            _invalidate_owned_post(post_oid)
+            
+            # Delete the post only if it belongs to the user (ownership check and delete in one write)
+            result = mongo.db.posts.delete_one({
+                "_id": post_oid,
                 "user_id": ObjectId(user_id)
             })
             
-            if not post:
+            if result.deleted_count == 0:
                 return {"message": "Post not found or you don't have permission to delete it"}, 404
             
-            # Cascade delete all related social data
-            # 1. Delete all likes for this post
-            likes_deleted = mongo.db.likes.delete_many({"post_id": ObjectId(post_id)})
+            # The author's post count changed
+            increment_user_posts_count(user_id, -1)
+            invalidate_public_profile(user_id)
             
-            # 2. Get all comments for this post to delete their replies and likes
-            comments = list(mongo.db.comments.find({"post_id": ObjectId(post_id)}))
-            comment_ids = [comment["_id"] for comment in comments]
+            # Cascade delete all related social data after responding
+            run_in_background(_cascade_delete_post, post_oid)
             
-            # 3. Delete all comment likes
-            if comment_ids:
-                mongo.db.comment_likes.delete_many({"comment_id": {"$in": comment_ids}})
-            
-            # 4. Get all replies to comments on this post
-            replies = list(mongo.db.replies.find({"comment_id": {"$in": comment_ids}})) if comment_ids else []
-            reply_ids = [reply["_id"] for reply in replies]
-            
-            # 5. Delete all reply likes
-            if reply_ids:
-                mongo.db.reply_likes.delete_many({"reply_id": {"$in": reply_ids}})
-            
-            # 6. Delete all replies to comments on this post
-            if comment_ids:
-                replies_deleted = mongo.db.replies.delete_many({"comment_id": {"$in": comment_ids}})
-            else:
-                class EmptyResult:
-                    deleted_count = 0
-                replies_deleted = EmptyResult()
-            
-            # 7. Delete all comments for this post
-            comments_deleted = mongo.db.comments.delete_many({"post_id": ObjectId(post_id)})
-            
-            # 8. Delete all notifications related to this post
-            notifications_deleted = mongo.db.notifications.delete_many({"post_id": ObjectId(post_id)})
-            
-            # 9. Finally, delete the post itself
-            result = mongo.db.posts.delete_one({"_id": ObjectId(post_id)})
-            
-            if result.deleted_count == 0:
-                return {"message": "Post not found"}, 404
-            
-            logger.info(f"Post {post_id} deleted by user {user_id} - removed {likes_deleted.deleted_count} post likes, {comments_deleted.deleted_count} comments, {replies_deleted.deleted_count} replies, {notifications_deleted.deleted_count} notifications, and all associated comment/reply likes")
-            return {"message": "Post deleted successfully"}, 200
+            logger.info(f"Post {post_id} deleted by user {user_id}")
+            return delete_success("Post deleted successfully")
             
         except Exception as e:
             logger.error(f"Error deleting post {post_id}: {str(e)}")
@@ -444,29 +524,20 @@ class PostFileDownload(Resource):
             file_id: The GridFS file ID
         """
         try:
-            if not ObjectId.is_valid(post_id) or not ObjectId.is_valid(file_id):
+            post_oid = to_object_id(post_id)
+            if post_oid is None or not ObjectId.is_valid(file_id):
                 return {"message": "Invalid post ID or file ID format"}, 400
                 
             user_id = get_jwt_identity()
             
-            # Verify the post belongs to the user
-            post = mongo.db.posts.find_one({
-                "_id": ObjectId(post_id),
-                "user_id": ObjectId(user_id)
-            })
+            # Verify the post belongs to the user (only its file list is needed, briefly cached)
+            files = _get_owned_post_files(post_oid, ObjectId(user_id))
             
-            if not post:
+            if files is None:
                 return {"message": "Post not found or you don't have permission to access it"}, 404
             
             # Check if the file belongs to this post
-            files = post.get("files", [])
-            file_found = False
-            for file_info in files:
-                if file_info.get("file_id") == file_id:
-                    file_found = True
-                    break
-            
-            if not file_found:
+            if not any(file_info.get("file_id") == file_id for file_info in files):
                 return {"message": "File not found in this post"}, 404
             
             # Get file from GridFS
@@ -474,15 +545,8 @@ class PostFileDownload(Resource):
             if not success:
                 return {"message": error_msg}, 404
             
-            # Return file as response
-            return Response(
-                file_obj.read(),
-                mimetype=file_obj.content_type,
-                headers={
-                    'Content-Disposition': f'attachment; filename="{file_obj.filename}"',
-                    'Content-Length': str(file_obj.length)
-                }
-            )
+            # Stream the file straight from GridFS
+            return send_gridfs_file(file_obj, file_obj.filename, file_obj.content_type)
             
         except Exception as e:
             logger.error(f"Error downloading file {file_id} from post {post_id}: {str(e)}")
@@ -500,22 +564,26 @@ class PublicUserProfile(Resource):
             user_id: The user ID of the profile to view
         """
         try:
-            if not ObjectId.is_valid(user_id):
+            user_oid = to_object_id(user_id)
+            if user_oid is None:
                 return {"message": "Invalid user ID format"}, 400
             
-            # Get user information
-            user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+            # Serve repeat views from the Redis cache
+            profile = get_cached_public_profile(user_id)
+            if profile:
+                return profile, 200
+            
+            # Get user information and post stats (count + likes received, one aggregation) together
+            user, (posts_count, likes_received) = run_concurrently(
+                lambda: mongo.db.users.find_one(
+                    {"_id": user_oid},
+                    {"username": 1, "fullname": 1, "bio": 1, "created_at": 1}
+                ),
+                lambda: get_post_stats(user_oid)
+            )
             if not user:
                 return {"message": "User not found"}, 404
             
-            # Count user's posts
-            posts_count = mongo.db.posts.count_documents({"user_id": ObjectId(user_id)})
-            
-            # Calculate total likes received across all user posts
-            user_posts = mongo.db.posts.find({"user_id": ObjectId(user_id)}, {"_id": 1})
-            post_ids = [post["_id"] for post in user_posts]
-            likes_received = mongo.db.likes.count_documents({"post_id": {"$in": post_ids}})
-            
             # Prepare response (exclude email for privacy)
             profile = {
                 "id": str(user["_id"]),
@@ -526,6 +594,7 @@ class PublicUserProfile(Resource):
                 "likes_received": likes_received,
                 "created_at": user["created_at"].isoformat() + "Z"
             }
+            cache_public_profile(user_id, profile)
             
             return profile, 200
             
@@ -548,71 +617,21 @@ class PublicUserPosts(Resource):
         - page: Page number (default: 1)
         - limit: Posts per page (default: 10, max: 50)
         - sort: Sort order (default: created_at_desc)
+        - cursor: Post ID to continue after, newest first (optional - replaces page/sort)
+        
+        For newest-first listings the cursor for the next page is returned in the X-Next-Cursor header.
         """
         try:
-            if not ObjectId.is_valid(user_id):
+            user_oid = to_object_id(user_id)
+            if user_oid is None:
                 return {"message": "Invalid user ID format"}, 400
             
-            # Verify user exists
-            user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+            # Verify user exists (usually served from the user info cache)
+            user = get_user_info(user_oid)
             if not user:
                 return {"message": "User not found"}, 404
             
-            page = int(request.args.get('page', 1))
-            limit = min(int(request.args.get('limit', 10)), 50)
-            sort = request.args.get('sort', 'created_at_desc')
-            
-            skip = (page - 1) * limit
-            
-            # Sort options
-            sort_options = {
-                'created_at_desc': [("created_at", -1)],
-                'created_at_asc': [("created_at", 1)],
-                'title_asc': [("title", 1)],
-                'title_desc': [("title", -1)],
-                'updated_at_desc': [("updated_at", -1)]
-            }
-            
-            sort_criteria = sort_options.get(sort, [("created_at", -1)])
-            
-            posts = []
-            total_posts = mongo.db.posts.count_documents({"user_id": ObjectId(user_id)})
-            
-            for post in mongo.db.posts.find({"user_id": ObjectId(user_id)}).sort(sort_criteria).skip(skip).limit(limit):
-                # Convert ObjectId to string
-                post["id"] = str(post["_id"])
-                post["user_id"] = str(post["user_id"])
-                
-                post["created_at"] = post["created_at"].isoformat()
-                if "updated_at" in post:
-                    post["updated_at"] = post["updated_at"].isoformat()
-                
-                # Get user information for this post
-                if user:
-                    post["author"] = {
-                        "username": user.get("username", f"User{str(post['user_id'])[-4:]}"),
-                        "id": str(user["_id"])
-                    }
-                else:
-                    post["author"] = {
-                        "username": f"User{str(post['user_id'])[-4:]}",
-                        "id": str(post["user_id"])
-                    }
-                
-                # Remove the _id field to avoid confusion
-                del post["_id"]
-                posts.append(post)
-            
-            return {
-                "posts": posts,
-                "pagination": {
-                    "page": page,
-                    "limit": limit,
-                    "total": total_posts,
-                    "pages": (total_posts + limit - 1) // limit
-                },
-                "sort": sort
-            }, 200
+            return _list_user_posts(user_oid)
             
         except Exception as e:
             logger.error(f"Error fetching user posts for {user_id}: {str(e)}")
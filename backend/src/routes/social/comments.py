@@ -16,9 +16,12 @@ from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.extensions import mongo, limiter
 from src.logger import logger
-from src.utils import check_post_exists, check_comment_exists, format_comment, get_user_info
+from src.utils import check_post_exists, check_comment_exists, invalidate_parent_refs, format_comment, get_users_info, get_current_user_info, run_in_background, run_notification_task, run_concurrently, delete_success, limit_concurrent_requests
 from src.utils.social_utils import create_notification, delete_notification
+from src.utils.pagination import find_newest_first, next_cursor_headers
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import datetime
 
 # Namespace
@@ -74,6 +77,28 @@ comment_like_response_model = comments_ns.model("CommentLikeResponse", {
     "created_at": fields.String(description="Like creation time")
 })
 
+# Fields the like listing renders (the parent ID is already known from the URL)
+LIKE_LIST_PROJECTION = {"user_id": 1, "created_at": 1}
+
+
+def _cascade_delete_comment(comment_oid):
+    """Delete all data that depends on a deleted comment"""
+    # 1. Delete all reply likes (likes on replies to this comment, only reply IDs are needed)
+    reply_ids = [reply["_id"] for reply in mongo.db.replies.find({"comment_id": comment_oid}, {"_id": 1})]
+    if reply_ids:
+        mongo.db.reply_likes.delete_many({"reply_id": {"$in": reply_ids}})
+    
+    # 2. Delete all comment likes (likes on this comment)
+    mongo.db.comment_likes.delete_many({"comment_id": comment_oid})
+    
+    # 3. Delete all replies to this comment
+    mongo.db.replies.delete_many({"comment_id": comment_oid})
+    
+    # 4. Delete all notifications for this comment and its replies in one round trip
+    # (reply notifications also carry the parent comment_id)
+    mongo.db.notifications.delete_many({"comment_id": comment_oid})
+    logger.info(f"Cascade cleanup completed for comment {comment_oid}")
+
 
 # Routes
 @comments_ns.route("/posts/<string:post_id>/comments")
@@ -95,7 +120,7 @@ class PostComments(Resource):
             if not content:
                 return {"message": "Comment content cannot be empty"}, 400
             
-            # Check if post exists
+            # Check if post exists (uncached: a comment must never be written for a just-deleted post)
             error, status_code = check_post_exists(post_id)
             if error:
                 return {"message": error}, status_code
@@ -110,31 +135,31 @@ class PostComments(Resource):
                 "updated_at": datetime.datetime.utcnow()
             }
             
-            mongo.db.comments.insert_one(comment_data)
-            
-            # Update post comments count
-            mongo.db.posts.update_one(
-                {"_id": ObjectId(post_id)},
-                {"$inc": {"comments_count": 1}}
+            # Insert the comment while updating the post comments count (and reading
+            # the post owner in the same round trip) - the two writes are independent
+            post_doc, _ = run_concurrently(
+                lambda: mongo.db.posts.find_one_and_update(
+                    {"_id": ObjectId(post_id)},
+                    {"$inc": {"comments_count": 1}},
+                    projection={"user_id": 1}
+                ),
+                lambda: mongo.db.comments.insert_one(comment_data)
             )
             
             # Format comment for response (new comment has no replies)
-            comment_data = format_comment(comment_data, include_replies=False)
+            comment_data = format_comment(comment_data, include_replies=False, user=get_current_user_info())
             
             logger.info(f"User {user_id} commented on post {post_id}")
-            # Create notification for post owner
-            try:
-                post_doc = mongo.db.posts.find_one({"_id": ObjectId(post_id)}, {"user_id": 1})
-                if post_doc:
-                    create_notification(
-                        recipient_id=post_doc.get("user_id"),
-                        actor_id=user_id,
-                        notif_type="comment_added",
-                        post_id=post_id,
-                        comment_id=comment_data.get("id")
-                    )
-            except Exception as e:
-                logger.error(f"Notification error on comment add: {str(e)}")
+            # Create notification for post owner off the request path
+            if post_doc:
+                run_notification_task(
+                    create_notification,
+                    recipient_id=post_doc.get("user_id"),
+                    actor_id=user_id,
+                    notif_type="comment_added",
+                    post_id=post_id,
+                    comment_id=comment_data.get("id")
+                )
             return comment_data, 201
             
         except Exception as e:
@@ -142,48 +167,67 @@ class PostComments(Resource):
             return {"message": "Internal server error"}, 500
 
     @jwt_required()
-    @comments_ns.doc(description="Get all comments for a specific post")
-    @comments_ns.marshal_with(comment_response_model, as_list=True)
+    @comments_ns.doc(description="Get all comments for a specific post", params={
+        "limit": "Comments per page (max: 100). Omit to return all comments",
+        "cursor": "ID of the last comment from the previous page (X-Next-Cursor header)"
+    })
+    @comments_ns.response(200, "Success", [comment_response_model])  # rows are built in the response shape, no marshalling pass
     @comments_ns.response(400, "Bad Request")
     @comments_ns.response(404, "Post Not Found")
     def get(self, post_id):
-        """Get all comments for a post"""
+        """
+        Get all comments for a post (newest first).
+        
+        Query parameters:
+        - limit: Comments per page (optional, max: 100)
+        - cursor: Comment ID to continue after (optional)
+        
+        When paginating, the cursor for the next page is returned in the X-Next-Cursor header.
+        """
         try:
             user_id = get_jwt_identity()
             # Check if post exists
-            error, status_code = check_post_exists(post_id)
+            error, status_code = check_post_exists(post_id, cached=True)
             if error:
                 return {"message": error}, status_code
             
+            # Newest first, with optional keyset pagination (limit/cursor)
+            cursor_results, limit, error = find_newest_first(mongo.db.comments, {"post_id": ObjectId(post_id)})
+            if error:
+                return {"message": error}, 400
+            
             # Get comments for the post (returns empty list if no comments)
-            comments = []
-            for comment in mongo.db.comments.find({"post_id": ObjectId(post_id)}).sort("created_at", -1):
-                # Format comment with all replies for complete social data
-                formatted_comment = format_comment(comment, include_replies=True)
-                # Add liked flag for current user on comment
-                try:
-                    liked_doc = mongo.db.comment_likes.find_one({
-                        "user_id": ObjectId(user_id),
-                        "comment_id": ObjectId(formatted_comment["id"]) 
-                    }) if user_id else None
-                    formatted_comment["liked"] = bool(liked_doc)
-                except Exception:
-                    formatted_comment["liked"] = False
-
-                # Add liked flag for each reply
-                if "replies" in formatted_comment:
-                    for r in formatted_comment["replies"]:
-                        try:
-                            liked_r = mongo.db.reply_likes.find_one({
-                                "user_id": ObjectId(user_id),
-                                "reply_id": ObjectId(r["id"]) 
-                            }) if user_id else None
-                            r["liked"] = bool(liked_r)
-                        except Exception:
-                            r["liked"] = False
-                comments.append(formatted_comment)
+            # Format each comment with all replies for complete social data
+            comments = [format_comment(comment, include_replies=True) for comment in cursor_results]
+            
+            # Resolve liked flags for the current user with one query per collection
+            # instead of one lookup per comment and per reply
+            liked_comment_ids = set()
+            liked_reply_ids = set()
+            if user_id and comments:
+                user_oid = ObjectId(user_id)
+                comment_ids = [ObjectId(c["id"]) for c in comments]
+                reply_ids = [ObjectId(r["id"]) for c in comments for r in c.get("replies", [])]
+                liked_comment_ids = {
+                    str(like["comment_id"])
+                    for like in mongo.db.comment_likes.find(
+                        {"user_id": user_oid, "comment_id": {"$in": comment_ids}}, {"comment_id": 1}
+                    )
+                }
+                if reply_ids:
+                    liked_reply_ids = {
+                        str(like["reply_id"])
+                        for like in mongo.db.reply_likes.find(
+                            {"user_id": user_oid, "reply_id": {"$in": reply_ids}}, {"reply_id": 1}
+                        )
+                    }
             
-            return comments, 200
+            for formatted_comment in comments:
+                formatted_comment["liked"] = formatted_comment["id"] in liked_comment_ids
+                for r in formatted_comment.get("replies", []):
+                    r["liked"] = r["id"] in liked_reply_ids
+            
+            return comments, 200, next_cursor_headers(comments, limit)
             
         except Exception as e:
             logger.error(f"Error fetching comments for post {post_id}: {str(e)}")
@@ -209,27 +253,27 @@ class CommentModify(Resource):
             if not content:
                 return {"message": "Comment content cannot be empty"}, 400
             
-            # Check if comment exists
-            comment, error, status_code = check_comment_exists(comment_id)
-            if error:
-                return {"message": error}, status_code
+            if not ObjectId.is_valid(comment_id):
+                return {"message": "Invalid comment ID format"}, 400
             
-            # Check if user owns the comment
-            if str(comment["user_id"]) != user_id:
-                return {"message": "You can only edit your own comments"}, 403
-            
-            # Update the comment
-            mongo.db.comments.update_one(
-                {"_id": ObjectId(comment_id)},
+            # Update only if the user owns the comment, reading it back in the same round trip
+            updated_comment = mongo.db.comments.find_one_and_update(
+                {"_id": ObjectId(comment_id), "user_id": ObjectId(user_id)},
                 {"$set": {
                     "content": content,
                     "updated_at": datetime.datetime.utcnow()
-                }}
+                }},
+                return_document=ReturnDocument.AFTER
             )
+            if not updated_comment:
+                # Nothing matched: tell a missing comment apart from someone else's
+                _, error, status_code = check_comment_exists(comment_id, cached=True)
+                if error:
+                    return {"message": error}, status_code
+                return {"message": "You can only edit your own comments"}, 403
             
-            # Get updated comment and format with replies
-            updated_comment = mongo.db.comments.find_one({"_id": ObjectId(comment_id)})
-            formatted_comment = format_comment(updated_comment, include_replies=True)
+            # Format the updated comment with replies
+            formatted_comment = format_comment(updated_comment, include_replies=True, user=get_current_user_info())
             
             logger.info(f"User {user_id} edited comment {comment_id}")
             return formatted_comment, 200
@@ -249,33 +293,20 @@ class CommentModify(Resource):
         try:
             user_id = get_jwt_identity()
             
-            # Check if comment exists
-            comment, error, status_code = check_comment_exists(comment_id)
+            # Check if comment exists (only ownership fields and the reply counter are needed)
+            comment, error, status_code = check_comment_exists(comment_id, {"user_id": 1, "post_id": 1, "replies_count": 1})
             if error:
                 return {"message": error}, status_code
             
-            # Check if user owns the comment or the post
-            post = mongo.db.posts.find_one({"_id": comment["post_id"]})
-            if str(comment["user_id"]) != user_id and str(post["user_id"]) != user_id:
+            # Check if user owns the comment or the post (post is only read when the user is not the author)
+            if str(comment["user_id"]) != user_id and not mongo.db.posts.count_documents({"_id": comment["post_id"], "user_id": ObjectId(user_id)}, limit=1):
                 return {"message": "You can only delete your own comments or comments on your posts"}, 403
             
-            # Count replies before deletion for proper post count update
-            replies = list(mongo.db.replies.find({"comment_id": ObjectId(comment_id)}))
-            replies_count = len(replies)
-            reply_ids = [reply["_id"] for reply in replies]
-            
-            # Cascade delete all related data:
-            # 1. Delete all reply likes (likes on replies to this comment)
-            if reply_ids:
-                mongo.db.reply_likes.delete_many({"reply_id": {"$in": reply_ids}})
-            
-            # 2. Delete all comment likes (likes on this comment)
-            mongo.db.comment_likes.delete_many({"comment_id": ObjectId(comment_id)})
-            
-            # 3. Delete all replies to this comment
-            mongo.db.replies.delete_many({"comment_id": ObjectId(comment_id)})
+            # Replies are counted from the denormalized counter (kept in sync on reply create/delete)
+            replies_count = comment.get("replies_count", 0)
             
-            # 4. Delete the comment itself
+            # Delete the comment itself; dependent data is cleaned up in the background
+            invalidate_parent_refs("comments", comment_id)
             mongo.db.comments.delete_one({"_id": ObjectId(comment_id)})
             
             # Update post comments count (comment + all its replies)
@@ -285,8 +316,11 @@ class CommentModify(Resource):
                 {"$inc": {"comments_count": -total_deleted}}
             )
             
+            # Cascade delete replies, likes and notifications off the request path
+            run_in_background(_cascade_delete_comment, ObjectId(comment_id))
+            
             logger.info(f"User {user_id} deleted comment {comment_id}")
-            return {"message": "Comment deleted successfully"}, 200
+            return delete_success("Comment deleted successfully")
             
         except Exception as e:
             logger.error(f"Error deleting comment {comment_id}: {str(e)}")
@@ -296,85 +330,113 @@ class CommentModify(Resource):
 class CommentLikes(Resource):
     @jwt_required()
     @limiter.limit("200 per minute")
-    @comments_ns.marshal_with(comment_like_response_model, as_list=True)
+    @comments_ns.doc(description="Get likes for a comment (newest first)", params={
+        "limit": "Likes per page (max: 100). Omit to return all likes",
+        "cursor": "ID of the last like from the previous page (X-Next-Cursor header)"
+    })
+    @comments_ns.response(200, "Success", [comment_like_response_model])  # rows are built in the response shape, no marshalling pass
     def get(self, comment_id):
         try:
             comment, error, status = check_comment_exists(comment_id)
             if error:
                 return {"message": error}, status
 
-            likes = []
-            for like in mongo.db.comment_likes.find({"comment_id": ObjectId(comment_id)}).sort("created_at", -1):
-                original_id = like["_id"]
-                original_user_id = like["user_id"]
-                like["id"] = str(original_id)
-                like["user"] = get_user_info(original_user_id)
-                like["comment_id"] = str(like["comment_id"])
-                like["created_at"] = like["created_at"].isoformat()
-                del like["_id"]
-                del like["user_id"]
-                likes.append(like)
-            return likes, 200
+            # Newest first, with optional keyset pagination (limit/cursor)
+            like_docs, limit, error = find_newest_first(mongo.db.comment_likes, {"comment_id": ObjectId(comment_id)}, LIKE_LIST_PROJECTION)
+            if error:
+                return {"message": error}, 400
+            like_docs = list(like_docs)
+
+            # Resolve all likers with one query instead of one lookup per like
+            users = get_users_info(like["user_id"] for like in like_docs)
+            likes = [
+                {
+                    "id": str(like["_id"]),
+                    "user": users.get(str(like["user_id"])),
+                    "comment_id": comment_id,
+                    "created_at": like["created_at"]  # orjson writes it as ISO 8601
+                }
+                for like in like_docs
+            ]
+
+            # Total comes from the denormalized counter, so no extra count query is needed
+            headers = {"X-Total-Count": str(comment.get("likes_count", 0)), **next_cursor_headers(likes, limit)}
+            return likes, 200, headers
         except Exception as e:
             logger.error(f"Error fetching likes for comment {comment_id}: {str(e)}")
             return {"message": "Internal server error"}, 500
 
     @jwt_required()
     @limiter.limit("100 per minute")
+    @limit_concurrent_requests("toggle")  # Cap parallel toggles per user
     @comments_ns.doc(description="Toggle like/unlike for a comment")
     def post(self, comment_id):
         try:
             user_id = get_jwt_identity()
-            comment, error, status = check_comment_exists(comment_id)
+            # Uncached read: a like must never be written for a just-deleted comment
+            comment, error, status = check_comment_exists(comment_id, {"user_id": 1, "post_id": 1})
             if error:
                 return {"message": error}, status
+            
+            # Parse the IDs once for every query below
+            user_oid = ObjectId(user_id)
+            comment_oid = ObjectId(comment_id)
 
-            existing = mongo.db.comment_likes.find_one({
-                "user_id": ObjectId(user_id),
-                "comment_id": ObjectId(comment_id)
+            # Try to unlike first: a successful delete means the user had liked the comment,
+            # so no separate "already liked" lookup is needed
+            removed = mongo.db.comment_likes.delete_one({
+                "user_id": user_oid,
+                "comment_id": comment_oid
             })
 
-            if existing:
-                mongo.db.comment_likes.delete_one({
-                    "user_id": ObjectId(user_id),
-                    "comment_id": ObjectId(comment_id)
-                })
-                mongo.db.comments.update_one({"_id": ObjectId(comment_id)}, {"$inc": {"likes_count": -1}})
-                updated = mongo.db.comments.find_one({"_id": ObjectId(comment_id)})
+            if removed.deleted_count:
+                # Decrement and read back the counter in one atomic round trip (never below zero)
+                updated = mongo.db.comments.find_one_and_update(
+                    {"_id": comment_oid, "likes_count": {"$gt": 0}},
+                    {"$inc": {"likes_count": -1}},
+                    projection={"likes_count": 1},
+                    return_document=ReturnDocument.AFTER
+                ) or {}
                 
                 # Delete the notification that was created when liking
-                try:
-                    delete_notification(
-                        recipient_id=comment["user_id"],
-                        actor_id=user_id,
-                        notif_type="comment_liked",
-                        post_id=comment["post_id"],
-                        comment_id=comment_id
-                    )
-                except Exception as e:
-                    logger.error(f"Notification deletion error on comment unlike: {str(e)}")
+                run_notification_task(
+                    delete_notification,
+                    recipient_id=comment["user_id"],
+                    actor_id=user_id,
+                    notif_type="comment_liked",
+                    post_id=comment["post_id"],
+                    comment_id=comment_id
+                )
                 
                 return {"liked": False, "likes_count": updated.get("likes_count", 0)}, 200
             else:
-                mongo.db.comment_likes.insert_one({
-                    "user_id": ObjectId(user_id),
-                    "comment_id": ObjectId(comment_id),
-                    "post_id": comment["post_id"],
-                    "created_at": datetime.datetime.utcnow()
-                })
-                mongo.db.comments.update_one({"_id": ObjectId(comment_id)}, {"$inc": {"likes_count": 1}})
-                updated = mongo.db.comments.find_one({"_id": ObjectId(comment_id)})
-                # Notify comment owner
                 try:
-                    create_notification(
-                        recipient_id=comment["user_id"],
-                        actor_id=user_id,
-                        notif_type="comment_liked",
-                        post_id=comment["post_id"],
-                        comment_id=comment["_id"]
-                    )
-                except Exception as e:
-                    logger.error(f"Notification error on comment like: {str(e)}")
+                    mongo.db.comment_likes.insert_one({
+                        "user_id": user_oid,
+                        "comment_id": comment_oid,
+                        "post_id": comment["post_id"],
+                        "created_at": datetime.datetime.utcnow()
+                    })
+                except DuplicateKeyError:
+                    # A concurrent request already liked it (unique user_id + comment_id index)
+                    current = mongo.db.comments.find_one({"_id": comment_oid}, {"likes_count": 1}) or {}
+                    return {"liked": True, "likes_count": current.get("likes_count", 0)}, 200
+                # Increment and read back the counter in one atomic round trip
+                updated = mongo.db.comments.find_one_and_update(
+                    {"_id": comment_oid},
+                    {"$inc": {"likes_count": 1}},
+                    projection={"likes_count": 1},
+                    return_document=ReturnDocument.AFTER
+                ) or {}
+                # Notify comment owner
+                run_notification_task(
+                    create_notification,
+                    recipient_id=comment["user_id"],
+                    actor_id=user_id,
+                    notif_type="comment_liked",
+                    post_id=comment["post_id"],
+                    comment_id=comment["_id"]
+                )
                 return {"liked": True, "likes_count": updated.get("likes_count", 0)}, 200
         except Exception as e:
             logger.error(f"Error toggling like on comment {comment_id}: {str(e)}")
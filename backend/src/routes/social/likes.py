@@ -6,6 +6,7 @@ It handles the core social interaction of users liking and unliking posts.
 
 Features:
 - Toggle like/unlike functionality (users can only like once)
+- Check whether the current user liked a post
 - Retrieve all likes for a specific post
 - User information display for each like
 """
@@ -14,9 +15,12 @@ from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.extensions import mongo, limiter
 from src.logger import logger
-from src.utils import get_user_info, check_post_exists
+from src.utils import get_users_info, check_post_exists, run_concurrently, run_notification_task, limit_concurrent_requests
 from src.utils.social_utils import create_notification, delete_notification
+from src.utils.pagination import find_newest_first, next_cursor_headers
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import datetime
 
 # Namespace
@@ -39,12 +43,46 @@ like_response_model = likes_ns.model("LikeResponse", {
     "created_at": fields.String(description="Like creation time")
 })
 
+# Fields the like listing renders (the parent ID is already known from the URL)
+LIKE_LIST_PROJECTION = {"user_id": 1, "created_at": 1}
+
 
 # Routes
 @likes_ns.route("/posts/<string:post_id>/like")
 class PostLike(Resource):
+    @jwt_required()
+    @limiter.limit("200 per minute")  # Allow more reads than writes
+    @likes_ns.doc(description="Check whether the current user liked a post.")
+    @likes_ns.response(200, "Success")
+    @likes_ns.response(400, "Bad Request")
+    @likes_ns.response(404, "Post Not Found")
+    def get(self, post_id):
+        """Get the current user's like status for a post"""
+        try:
+            if not ObjectId.is_valid(post_id):
+                return {"message": "Invalid post ID format"}, 400
+            
+            user_id = get_jwt_identity()
+            
+            # Read the counter and probe for this user's like (at most one index entry) together
+            post, liked = run_concurrently(
+                lambda: mongo.db.posts.find_one({"_id": ObjectId(post_id)}, {"likes_count": 1}),
+                lambda: mongo.db.likes.count_documents(
+                    {"user_id": ObjectId(user_id), "post_id": ObjectId(post_id)}, limit=1
+                ) > 0
+            )
+            if not post:
+                return {"message": "Post not found"}, 404
+            
+            return {"liked": liked, "likes_count": post.get("likes_count", 0)}, 200
+            
+        except Exception as e:
+            logger.error(f"Error fetching like status for post {post_id}: {str(e)}")
+            return {"message": "Internal server error"}, 500
+
     @jwt_required()
     @limiter.limit("100 per minute")  # Allow rapid like/unlike
+    @limit_concurrent_requests("toggle")  # Cap parallel toggles per user
     @likes_ns.doc(description="Toggle like/unlike for a post.")
     @likes_ns.response(200, "Success")
     @likes_ns.response(400, "Bad Request")
@@ -54,45 +92,42 @@ class PostLike(Resource):
         try:
             user_id = get_jwt_identity()
             
-            # Check if post exists
+            # Check if post exists (uncached: a like must never be written for a just-deleted post)
             error, status_code = check_post_exists(post_id)
             if error:
                 return {"message": error}, status_code
             
-            # Check if user already liked the post
-            existing_like = mongo.db.likes.find_one({
-                "user_id": ObjectId(user_id),
-                "post_id": ObjectId(post_id)
+            # Parse the IDs once for every query below
+            user_oid = ObjectId(user_id)
+            post_oid = ObjectId(post_id)
+            
+            # Try to unlike first: a successful delete means the user had liked the post,
+            # so no separate "already liked" probe is needed
+            removed = mongo.db.likes.delete_one({
+                "user_id": user_oid,
+                "post_id": post_oid
             })
             
-            if existing_like:
-                # Unlike the post
-                mongo.db.likes.delete_one({
-                    "user_id": ObjectId(user_id),
-                    "post_id": ObjectId(post_id)
-                })
-                
-                # Decrement likes count
-                mongo.db.posts.update_one(
-                    {"_id": ObjectId(post_id)},
-                    {"$inc": {"likes_count": -1}}
-                )
-                
-                # Get updated likes count and post owner
-                updated_post = mongo.db.posts.find_one({"_id": ObjectId(post_id)})
+            if removed.deleted_count:
+                # Decrement likes count and read it back in one atomic write
+                # (the guard keeps the counter from going negative)
+                updated_post = mongo.db.posts.find_one_and_update(
+                    {"_id": post_oid, "likes_count": {"$gt": 0}},
+                    {"$inc": {"likes_count": -1}},
+                    projection={"likes_count": 1, "user_id": 1},
+                    return_document=ReturnDocument.AFTER
+                ) or mongo.db.posts.find_one({"_id": post_oid}, {"likes_count": 1, "user_id": 1}) or {}
                 likes_count = updated_post.get("likes_count", 0)
                 post_owner_id = updated_post.get("user_id")
                 
                 # Delete the notification that was created when liking
-                try:
-                    delete_notification(
-                        recipient_id=post_owner_id,
-                        actor_id=user_id,
-                        notif_type="post_liked",
-                        post_id=post_id
-                    )
-                except Exception as e:
-                    logger.error(f"Notification deletion error on post unlike: {str(e)}")
+                run_notification_task(
+                    delete_notification,
+                    recipient_id=post_owner_id,
+                    actor_id=user_id,
+                    notif_type="post_liked",
+                    post_id=post_id
+                )
                 
                 logger.info(f"User {user_id} unliked post {post_id}")
                 return {
@@ -103,34 +138,39 @@ class PostLike(Resource):
             else:
                 # Like the post
                 like_data = {
-                    "user_id": ObjectId(user_id),
-                    "post_id": ObjectId(post_id),
+                    "user_id": user_oid,
+                    "post_id": post_oid,
                     "created_at": datetime.datetime.utcnow()
                 }
                 
-                mongo.db.likes.insert_one(like_data)
-                
-                # Increment likes count
-                mongo.db.posts.update_one(
-                    {"_id": ObjectId(post_id)},
-                    {"$inc": {"likes_count": 1}}
-                )
+                try:
+                    mongo.db.likes.insert_one(like_data)
+                except DuplicateKeyError:
+                    # A concurrent request already liked it (unique user_id + post_id index)
+                    current = mongo.db.posts.find_one({"_id": post_oid}, {"likes_count": 1}) or {}
+                    return {
+                        "message": "Post liked successfully",
+                        "liked": True,
+                        "likes_count": current.get("likes_count", 0)
+                    }, 200
                 
-                # Get updated likes count
-                updated_post = mongo.db.posts.find_one({"_id": ObjectId(post_id)})
+                # Increment likes count and read it back in one atomic write
+                updated_post = mongo.db.posts.find_one_and_update(
+                    {"_id": post_oid},
+                    {"$inc": {"likes_count": 1}},
+                    projection={"likes_count": 1, "user_id": 1},
+                    return_document=ReturnDocument.AFTER
+                ) or {}
                 likes_count = updated_post.get("likes_count", 0)
 
                 # Create notification for post owner
-                try:
-                    recipient = updated_post.get("user_id")
-                    create_notification(
-                        recipient_id=recipient,
-                        actor_id=user_id,
-                        notif_type="post_liked",
-                        post_id=post_id
-                    )
-                except Exception as e:
-                    logger.error(f"Notification error on post like: {str(e)}")
+                run_notification_task(
+                    create_notification,
+                    recipient_id=updated_post.get("user_id"),
+                    actor_id=user_id,
+                    notif_type="post_liked",
+                    post_id=post_id
+                )
                 
                 logger.info(f"User {user_id} liked post {post_id}")
                 return {
@@ -147,37 +187,41 @@ class PostLike(Resource):
 class PostLikes(Resource):
     @jwt_required()
     @limiter.limit("200 per minute")  # Allow more reads than writes
-    @likes_ns.doc(description="Get all likes for a specific post")
-    @likes_ns.marshal_with(like_response_model, as_list=True)
+    @likes_ns.doc(description="Get all likes for a specific post", params={
+        "limit": "Likes per page (max: 100). Omit to return all likes",
+        "cursor": "ID of the last like from the previous page (X-Next-Cursor header)"
+    })
+    @likes_ns.response(200, "Success", [like_response_model])  # rows are built in the response shape, no marshalling pass
     @likes_ns.response(400, "Bad Request")
     @likes_ns.response(404, "Post Not Found")
     def get(self, post_id):
         """Get all likes for a post"""
         try:
             # Check if post exists
-            error, status_code = check_post_exists(post_id)
+            error, status_code = check_post_exists(post_id, cached=True)
             if error:
                 return {"message": error}, status_code
             
-            # Get likes for the post (returns empty list if no likes)
-            likes = []
-            for like in mongo.db.likes.find({"post_id": ObjectId(post_id)}).sort("created_at", -1):
-                # Store original IDs before conversion
-                original_id = like["_id"]
-                original_user_id = like["user_id"]
-                
-                # Convert fields for API response
-                like["id"] = str(original_id)
-                like["user"] = get_user_info(original_user_id)
-                like["post_id"] = str(like["post_id"])
-                like["created_at"] = like["created_at"].isoformat()
-                
-                # Remove MongoDB internal fields
-                del like["_id"]
-                del like["user_id"]
-                likes.append(like)
+            # Get likes for the post newest first (returns empty list if no likes),
+            # with optional keyset pagination (limit/cursor)
+            like_docs, limit, error = find_newest_first(mongo.db.likes, {"post_id": ObjectId(post_id)}, LIKE_LIST_PROJECTION)
+            if error:
+                return {"message": error}, 400
+            like_docs = list(like_docs)
+            
+            # Resolve all likers with one query instead of one lookup per like
+            users = get_users_info(like["user_id"] for like in like_docs)
+            likes = [
+                {
+                    "id": str(like["_id"]),
+                    "user": users.get(str(like["user_id"])),
+                    "post_id": post_id,
+                    "created_at": like["created_at"]  # orjson writes it as ISO 8601
+                }
+                for like in like_docs
+            ]
             
-            return likes, 200
+            return likes, 200, next_cursor_headers(likes, limit)
             
         except Exception as e:
             logger.error(f"Error fetching likes for post {post_id}: {str(e)}")
@@ -16,9 +16,12 @@ from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.extensions import mongo, limiter
 from src.logger import logger
-from src.utils import check_comment_exists, check_reply_exists, format_reply, get_user_info
-from src.utils.social_utils import create_notification, delete_notification
+from src.utils import check_comment_exists, check_reply_exists, invalidate_parent_refs, format_reply, get_users_info, get_current_user_info, delete_success, run_concurrently, run_in_background, run_notification_task, limit_concurrent_requests
+from src.utils.social_utils import create_notification, create_notifications, delete_notification
+from src.utils.pagination import find_newest_first, next_cursor_headers
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import datetime
 
 # Namespace
@@ -57,6 +60,25 @@ reply_like_response_model = replies_ns.model("ReplyLikeResponse", {
     "created_at": fields.String(description="Like creation time")
 })
 
+# Fields the like listing renders (the parent ID is already known from the URL)
+LIKE_LIST_PROJECTION = {"user_id": 1, "created_at": 1}
+
+# Fields format_reply renders for the reply listing (keeps any other stored fields off the wire)
+REPLY_LIST_PROJECTION = {
+    "user_id": 1, "comment_id": 1, "post_id": 1, "content": 1,
+    "created_at": 1, "updated_at": 1, "likes_count": 1
+}
+
+
+def _cascade_delete_reply(reply_oid):
+    """Delete all data that depends on a deleted reply"""
+    # 1. Delete all likes on this reply
+    mongo.db.reply_likes.delete_many({"reply_id": reply_oid})
+    
+    # 2. Delete all notifications about this reply
+    mongo.db.notifications.delete_many({"reply_id": reply_oid})
+    logger.info(f"Cascade cleanup completed for reply {reply_oid}")
+
 
 # Routes
 @replies_ns.route("/comments/<string:comment_id>/replies")
@@ -78,8 +100,8 @@ class CommentReplies(Resource):
             if not content:
                 return {"message": "Reply content cannot be empty"}, 400
             
-            # Check if comment exists
-            comment, error, status_code = check_comment_exists(comment_id)
+            # Check if comment exists (uncached: a reply must never be written for a just-deleted comment)
+            comment, error, status_code = check_comment_exists(comment_id, {"user_id": 1, "post_id": 1})
             if error:
                 return {"message": error}, status_code
             
@@ -93,53 +115,39 @@ class CommentReplies(Resource):
                 "updated_at": datetime.datetime.utcnow()
             }
             
-            mongo.db.replies.insert_one(reply_data)
-            
-            # Update comment replies count for individual comment tracking
-            mongo.db.comments.update_one(
-                {"_id": ObjectId(comment_id)},
-                {"$inc": {"replies_count": 1}}
-            )
-            
-            # Update post comments count (includes replies in total count like social media)
-            mongo.db.posts.update_one(
-                {"_id": ObjectId(comment["post_id"])},
-                {"$inc": {"comments_count": 1}}
+            # Insert the reply and update both counters concurrently (they are independent):
+            # - comment replies count for individual comment tracking
+            # - post comments count (includes replies in total count like social media),
+            #   reading the post owner in the same round trip for notifications
+            post, _, _ = run_concurrently(
+                lambda: mongo.db.posts.find_one_and_update(
+                    {"_id": ObjectId(comment["post_id"])},
+                    {"$inc": {"comments_count": 1}},
+                    projection={"user_id": 1}
+                ),
+                lambda: mongo.db.replies.insert_one(reply_data),
+                lambda: mongo.db.comments.update_one(
+                    {"_id": ObjectId(comment_id)},
+                    {"$inc": {"replies_count": 1}}
+                )
             )
             
             # Format reply for response
-            reply_data = format_reply(reply_data)
+            reply_data = format_reply(reply_data, user=get_current_user_info())
             
             logger.info(f"User {user_id} replied to comment {comment_id}")
-            # Notify comment owner and post owner
-            try:
-                # Get post owner
-                post = mongo.db.posts.find_one({"_id": comment["post_id"]}, {"user_id": 1})
-                post_owner_id = post.get("user_id") if post else None
-                comment_owner_id = comment["user_id"]
-                
-                # Notify comment owner
-                create_notification(
-                    recipient_id=comment_owner_id,
-                    actor_id=user_id,
-                    notif_type="reply_added",
-                    post_id=comment["post_id"],
-                    comment_id=comment["_id"],
-                    reply_id=reply_data.get("id")
-                )
-                
-                # Notify post owner if different from comment owner and different from replier
-                if post_owner_id and str(post_owner_id) != str(comment_owner_id) and str(post_owner_id) != user_id:
-                    create_notification(
-                        recipient_id=post_owner_id,
-                        actor_id=user_id,
-                        notif_type="reply_added",
-                        post_id=comment["post_id"],
-                        comment_id=comment["_id"],
-                        reply_id=reply_data.get("id")
-                    )
-            except Exception as e:
-                logger.error(f"Notification error on reply add: {str(e)}")
+            # Notify comment owner and post owner with a single insert off the request path
+            # (duplicates and the replier themself are skipped)
+            post_owner_id = post.get("user_id") if post else None
+            run_notification_task(
+                create_notifications,
+                [comment["user_id"], post_owner_id],
+                actor_id=user_id,
+                notif_type="reply_added",
+                post_id=comment["post_id"],
+                comment_id=comment["_id"],
+                reply_id=reply_data.get("id")
+            )
             return reply_data, 201
             
         except Exception as e:
@@ -147,26 +155,47 @@ class CommentReplies(Resource):
             return {"message": "Internal server error"}, 500
 
     @jwt_required()
-    @replies_ns.doc(description="Get all replies for a specific comment")
-    @replies_ns.marshal_with(reply_response_model, as_list=True)
+    @replies_ns.doc(description="Get all replies for a specific comment", params={
+        "limit": "Replies per page (max: 100). Omit to return all replies",
+        "cursor": "ID of the last reply from the previous page (X-Next-Cursor header)"
+    })
+    @replies_ns.response(200, "Success", [reply_response_model])  # rows are built in the response shape, no marshalling pass
     @replies_ns.response(400, "Bad Request")
     @replies_ns.response(404, "Comment Not Found")
     def get(self, comment_id):
         """Get all replies for a comment"""
         try:
+            user_id = get_jwt_identity()
+            
             # Check if comment exists
-            comment, error, status_code = check_comment_exists(comment_id)
+            comment, error, status_code = check_comment_exists(comment_id, cached=True)
             if error:
                 return {"message": error}, status_code
             
-            # Get replies for the comment (returns empty list if no replies)
-            replies = []
-            for reply in mongo.db.replies.find({"comment_id": ObjectId(comment_id)}).sort("created_at", -1):
-                # Format reply for complete social data
-                formatted_reply = format_reply(reply)
-                replies.append(formatted_reply)
+            # Get replies for the comment newest first (returns empty list if no replies),
+            # with optional keyset pagination (limit/cursor)
+            reply_docs, limit, error = find_newest_first(mongo.db.replies, {"comment_id": ObjectId(comment_id)}, REPLY_LIST_PROJECTION)
+            if error:
+                return {"message": error}, 400
+            reply_docs = list(reply_docs)
             
-            return replies, 200
+            # Resolve all reply authors and the current user's liked replies together,
+            # one query each instead of one lookup per reply
+            reply_ids = [reply["_id"] for reply in reply_docs]
+            users, liked_reply_ids = run_concurrently(
+                lambda: get_users_info(reply["user_id"] for reply in reply_docs),
+                lambda: {
+                    str(like["reply_id"])
+                    for like in mongo.db.reply_likes.find(
+                        {"user_id": ObjectId(user_id), "reply_id": {"$in": reply_ids}}, {"reply_id": 1}
+                    )
+                } if reply_ids else set()
+            )
+            replies = [format_reply(reply, user=users.get(str(reply["user_id"]))) for reply in reply_docs]
+            for reply in replies:
+                reply["liked"] = reply["id"] in liked_reply_ids
+            
+            return replies, 200, next_cursor_headers(replies, limit)
             
         except Exception as e:
             logger.error(f"Error fetching replies for comment {comment_id}: {str(e)}")
@@ -192,27 +221,27 @@ class ReplyModify(Resource):
             if not content:
                 return {"message": "Reply content cannot be empty"}, 400
             
-            # Check if reply exists
-            reply, error, status_code = check_reply_exists(reply_id)
-            if error:
-                return {"message": error}, status_code
-            
-            # Check if user owns the reply
-            if str(reply["user_id"]) != user_id:
-                return {"message": "You can only edit your own replies"}, 403
+            if not ObjectId.is_valid(reply_id):
+                return {"message": "Invalid reply ID format"}, 400
             
-            # Update the reply
-            mongo.db.replies.update_one(
-                {"_id": ObjectId(reply_id)},
+            # Update only if the user owns the reply, reading it back in the same round trip
+            updated_reply = mongo.db.replies.find_one_and_update(
+                {"_id": ObjectId(reply_id), "user_id": ObjectId(user_id)},
                 {"$set": {
                     "content": content,
                     "updated_at": datetime.datetime.utcnow()
-                }}
+                }},
+                return_document=ReturnDocument.AFTER
             )
+            if not updated_reply:
+                # Nothing matched: tell a missing reply apart from someone else's
+                _, error, status_code = check_reply_exists(reply_id, cached=True)
+                if error:
+                    return {"message": error}, status_code
+                return {"message": "You can only edit your own replies"}, 403
             
-            # Get updated reply and format for complete social data
-            updated_reply = mongo.db.replies.find_one({"_id": ObjectId(reply_id)})
-            formatted_reply = format_reply(updated_reply)
+            # Format the updated reply for complete social data
+            formatted_reply = format_reply(updated_reply, user=get_current_user_info())
             
             logger.info(f"User {user_id} edited reply {reply_id}")
             return formatted_reply, 200
@@ -232,37 +261,38 @@ class ReplyModify(Resource):
         try:
             user_id = get_jwt_identity()
             
-            # Check if reply exists
-            reply, error, status_code = check_reply_exists(reply_id)
+            # Check if reply exists (only ownership and parent fields are needed)
+            reply, error, status_code = check_reply_exists(reply_id, {"user_id": 1, "post_id": 1, "comment_id": 1})
             if error:
                 return {"message": error}, status_code
             
-            # Check if user owns the reply or the post
-            post = mongo.db.posts.find_one({"_id": reply["post_id"]})
-            if str(reply["user_id"]) != user_id and str(post["user_id"]) != user_id:
+            # Check if user owns the reply or the post (post is only read when the user is not the author)
+            if str(reply["user_id"]) != user_id and not mongo.db.posts.count_documents({"_id": reply["post_id"], "user_id": ObjectId(user_id)}, limit=1):
                 return {"message": "You can only delete your own replies or replies on your posts"}, 403
             
-            # Cascade delete all related data
-            # 1. Delete all likes on this reply
-            mongo.db.reply_likes.delete_many({"reply_id": ObjectId(reply_id)})
-            
-            # 2. Delete the reply itself
-            mongo.db.replies.delete_one({"_id": ObjectId(reply_id)})
+            # Delete the reply itself; dependent data is cleaned up in the background
+            invalidate_parent_refs("replies", reply_id)
+            removed = mongo.db.replies.delete_one({"_id": ObjectId(reply_id)})
             
-            # Update comment replies count for proper tracking
-            mongo.db.comments.update_one(
-                {"_id": reply["comment_id"]},
-                {"$inc": {"replies_count": -1}}
-            )
+            # Update comment replies count and post comments count concurrently
+            # (skipped when a concurrent request already deleted the reply)
+            if removed.deleted_count:
+                run_concurrently(
+                    lambda: mongo.db.comments.update_one(
+                        {"_id": reply["comment_id"]},
+                        {"$inc": {"replies_count": -1}}
+                    ),
+                    lambda: mongo.db.posts.update_one(
+                        {"_id": reply["post_id"]},
+                        {"$inc": {"comments_count": -1}}
+                    )
+                )
             
-            # Update post comments count for proper tracking
-            mongo.db.posts.update_one(
-                {"_id": reply["post_id"]},
-                {"$inc": {"comments_count": -1}}
-            )
+            # Cascade delete likes and notifications off the request path
+            run_in_background(_cascade_delete_reply, ObjectId(reply_id))
             
             logger.info(f"User {user_id} deleted reply {reply_id}")
-            return {"message": "Reply deleted successfully"}, 200
+            return delete_success("Reply deleted successfully")
             
         except Exception as e:
             logger.error(f"Error deleting reply {reply_id}: {str(e)}")
@@ -273,88 +303,113 @@ class ReplyModify(Resource):
 class ReplyLikes(Resource):
     @jwt_required()
     @limiter.limit("200 per minute")
-    @replies_ns.marshal_with(reply_like_response_model, as_list=True)
+    @replies_ns.doc(description="Get likes for a reply (newest first)", params={
+        "limit": "Likes per page (max: 100). Omit to return all likes",
+        "cursor": "ID of the last like from the previous page (X-Next-Cursor header)"
+    })
+    @replies_ns.response(200, "Success", [reply_like_response_model])  # rows are built in the response shape, no marshalling pass
     def get(self, reply_id):
         try:
-            reply, error, status = check_reply_exists(reply_id)
+            reply, error, status = check_reply_exists(reply_id, cached=True)
             if error:
                 return {"message": error}, status
 
-            likes = []
-            for like in mongo.db.reply_likes.find({"reply_id": ObjectId(reply_id)}).sort("created_at", -1):
-                original_id = like["_id"]
-                original_user_id = like["user_id"]
-                like["id"] = str(original_id)
-                like["user"] = get_user_info(original_user_id)
-                like["reply_id"] = str(like["reply_id"])
-                like["created_at"] = like["created_at"].isoformat()
-                del like["_id"]
-                del like["user_id"]
-                likes.append(like)
-            return likes, 200
+            # Newest first, with optional keyset pagination (limit/cursor)
+            like_docs, limit, error = find_newest_first(mongo.db.reply_likes, {"reply_id": ObjectId(reply_id)}, LIKE_LIST_PROJECTION)
+            if error:
+                return {"message": error}, 400
+            like_docs = list(like_docs)
+            
+            # Resolve all likers with one query instead of one lookup per like
+            users = get_users_info(like["user_id"] for like in like_docs)
+            likes = [
+                {
+                    "id": str(like["_id"]),
+                    "user": users.get(str(like["user_id"])),
+                    "reply_id": reply_id,
+                    "created_at": like["created_at"]  # orjson writes it as ISO 8601
+                }
+                for like in like_docs
+            ]
+            return likes, 200, next_cursor_headers(likes, limit)
         except Exception as e:
             logger.error(f"Error fetching likes for reply {reply_id}: {str(e)}")
             return {"message": "Internal server error"}, 500
 
     @jwt_required()
     @limiter.limit("100 per minute")
+    @limit_concurrent_requests("toggle")  # Cap parallel toggles per user
     @replies_ns.doc(description="Toggle like/unlike for a reply")
     def post(self, reply_id):
         try:
             user_id = get_jwt_identity()
-            reply, error, status = check_reply_exists(reply_id)
+            # Uncached read: a like must never be written for a just-deleted reply
+            reply, error, status = check_reply_exists(reply_id, {"user_id": 1, "post_id": 1, "comment_id": 1})
             if error:
                 return {"message": error}, status
+            
+            # Parse the IDs once for every query below
+            user_oid = ObjectId(user_id)
+            reply_oid = ObjectId(reply_id)
 
-            existing = mongo.db.reply_likes.find_one({
-                "user_id": ObjectId(user_id),
-                "reply_id": ObjectId(reply_id)
+            # Try to unlike first: a successful delete means the user had liked the reply,
+            # so no separate "already liked" lookup is needed
+            removed = mongo.db.reply_likes.delete_one({
+                "user_id": user_oid,
+                "reply_id": reply_oid
             })
 
-            if existing:
-                mongo.db.reply_likes.delete_one({
-                    "user_id": ObjectId(user_id),
-                    "reply_id": ObjectId(reply_id)
-                })
-                mongo.db.replies.update_one({"_id": ObjectId(reply_id)}, {"$inc": {"likes_count": -1}})
-                updated = mongo.db.replies.find_one({"_id": ObjectId(reply_id)})
+            if removed.deleted_count:
+                # Decrement and read back the counter in one atomic round trip (never below zero)
+                updated = mongo.db.replies.find_one_and_update(
+                    {"_id": reply_oid, "likes_count": {"$gt": 0}},
+                    {"$inc": {"likes_count": -1}},
+                    projection={"likes_count": 1},
+                    return_document=ReturnDocument.AFTER
+                ) or {}
                 
                 # Delete the notification that was created when liking
-                try:
-                    delete_notification(
-                        recipient_id=reply["user_id"],
-                        actor_id=user_id,
-                        notif_type="reply_liked",
-                        post_id=reply["post_id"],
-                        comment_id=reply["comment_id"],
-                        reply_id=reply_id
-                    )
-                except Exception as e:
-                    logger.error(f"Notification deletion error on reply unlike: {str(e)}")
+                run_notification_task(
+                    delete_notification,
+                    recipient_id=reply["user_id"],
+                    actor_id=user_id,
+                    notif_type="reply_liked",
+                    post_id=reply["post_id"],
+                    comment_id=reply["comment_id"],
+                    reply_id=reply_id
+                )
                 
                 return {"liked": False, "likes_count": updated.get("likes_count", 0)}, 200
             else:
-                mongo.db.reply_likes.insert_one({
-                    "user_id": ObjectId(user_id),
-                    "reply_id": ObjectId(reply_id),
-                    "comment_id": reply["comment_id"],
-                    "post_id": reply["post_id"],
-                    "created_at": datetime.datetime.utcnow()
-                })
-                mongo.db.replies.update_one({"_id": ObjectId(reply_id)}, {"$inc": {"likes_count": 1}})
-                updated = mongo.db.replies.find_one({"_id": ObjectId(reply_id)})
-                # Notify reply owner
                 try:
-                    create_notification(
-                        recipient_id=reply["user_id"],
-                        actor_id=user_id,
-                        notif_type="reply_liked",
-                        post_id=reply["post_id"],
-                        comment_id=reply["comment_id"],
-                        reply_id=reply["_id"]
-                    )
-                except Exception as e:
-                    logger.error(f"Notification error on reply like: {str(e)}")
+                    mongo.db.reply_likes.insert_one({
+                        "user_id": user_oid,
+                        "reply_id": reply_oid,
+                        "comment_id": reply["comment_id"],
+                        "post_id": reply["post_id"],
+                        "created_at": datetime.datetime.utcnow()
+                    })
+                except DuplicateKeyError:
+                    # A concurrent request already liked it (unique user_id + reply_id index)
+                    current = mongo.db.replies.find_one({"_id": reply_oid}, {"likes_count": 1}) or {}
+                    return {"liked": True, "likes_count": current.get("likes_count", 0)}, 200
+                # Increment and read back the counter in one atomic round trip
+                updated = mongo.db.replies.find_one_and_update(
+                    {"_id": reply_oid},
+                    {"$inc": {"likes_count": 1}},
+                    projection={"likes_count": 1},
+                    return_document=ReturnDocument.AFTER
+                ) or {}
+                # Notify reply owner
+                run_notification_task(
+                    create_notification,
+                    recipient_id=reply["user_id"],
+                    actor_id=user_id,
+                    notif_type="reply_liked",
+                    post_id=reply["post_id"],
+                    comment_id=reply["comment_id"],
+                    reply_id=reply["_id"]
+                )
                 return {"liked": True, "likes_count": updated.get("likes_count", 0)}, 200
         except Exception as e:
             logger.error(f"Error toggling like on reply {reply_id}: {str(e)}")
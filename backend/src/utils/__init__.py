@@ -2,12 +2,18 @@
 Utility modules for DevShare API
 """
 
-from .file_utils import upload_files_to_gridfs, get_file_from_gridfs, download_file_from_post
-from .social_utils import get_user_info, check_post_exists, check_comment_exists, check_reply_exists, format_reply, format_comment, create_notification, delete_notification
+from .file_utils import upload_files_to_gridfs, get_file_from_gridfs, download_file_from_post, send_gridfs_file
+from .social_utils import to_object_id, get_cached_document, get_documents_by_ids, get_user_info, get_users_info, get_user_posts_count, increment_user_posts_count, attach_authors, invalidate_user_info, get_current_user_info, check_post_exists, invalidate_post_exists, check_comment_exists, check_reply_exists, invalidate_parent_refs, format_reply, format_comment, create_notification, create_notifications, delete_notification, get_unread_count, invalidate_unread_count, get_cached_public_profile, cache_public_profile, invalidate_public_profile
+from .background import run_in_background, run_notification_task, run_concurrently
+from .response_utils import delete_success
+from .request_limits import limit_concurrent_requests
+from .validation import is_valid_github_link
 
 __all__ = [
-        "upload_files_to_gridfs", "get_file_from_gridfs", "download_file_from_post",
-        "get_user_info", "check_post_exists", "check_comment_exists", "check_reply_exists",
+        "upload_files_to_gridfs", "get_file_from_gridfs", "download_file_from_post", "send_gridfs_file",
+        "to_object_id", "get_cached_document", "get_documents_by_ids", "get_user_info", "get_users_info", "get_user_posts_count", "increment_user_posts_count", "attach_authors", "invalidate_user_info", "get_current_user_info", "check_post_exists", "invalidate_post_exists", "check_comment_exists", "check_reply_exists", "invalidate_parent_refs",
         "format_reply", "format_comment",
-        "create_notification", "delete_notification",
+        "create_notification", "create_notifications", "delete_notification", "get_unread_count", "invalidate_unread_count",
+        "get_cached_public_profile", "cache_public_profile", "invalidate_public_profile",
+        "run_in_background", "run_notification_task", "run_concurrently", "delete_success", "limit_concurrent_requests", "is_valid_github_link",
     ]
@@ -0,0 +1,75 @@
+"""
+Background Task Utilities
+
+Runs follow-up database work (cascade cleanups, notifications) outside the
+request/response cycle using a shared in-process thread pool, and overlaps
+independent database calls made within a single request.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from src.logger import logger
+
+# Shared pool for background work (threads are started lazily on first submit)
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="devshare-bg")
+
+# Notification writes run on a single worker, in submission order, so a like's
+# notification is always created before an immediate unlike deletes it
+_notification_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="devshare-notify")
+
+# Separate pool for request-scoped calls so slow background work never delays a response
+_io_executor = ThreadPoolExecutor(max_workers=10, thread_name_prefix="devshare-io")
+
+
+def _run_task(func, args, kwargs):
+    """Run a background task and log failures instead of raising"""
+    try:
+        func(*args, **kwargs)
+    except Exception as e:
+        # Never let a background failure go unnoticed
+        logger.error(f"Background task {getattr(func, '__name__', func)} failed: {str(e)}", exc_info=True)
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Schedule a function to run on the background thread pool.
+
+    Args:
+        func: Callable to execute
+        *args, **kwargs: Arguments passed to the callable
+
+    Returns:
+        Future for the scheduled task
+    """
+    return _executor.submit(_run_task, func, args, kwargs)
+
+
+def run_notification_task(func, *args, **kwargs):
+    """
+    Schedule a notification create/delete off the request path (FIFO order).
+
+    Args:
+        func: Notification helper to execute (e.g. create_notification)
+        *args, **kwargs: Arguments passed to the helper
+
+    Returns:
+        Future for the scheduled task
+    """
+    return _notification_executor.submit(_run_task, func, args, kwargs)
+
+
+def run_concurrently(*calls):
+    """
+    Run independent database calls at the same time and wait for all of them.
+
+    The first call runs on the current thread; the rest run on the I/O pool.
+
+    Args:
+        *calls: Zero-argument callables (e.g. lambdas)
+
+    Returns:
+        List of results in the same order as the calls (exceptions are re-raised)
+    """
+    futures = [_io_executor.submit(call) for call in calls[1:]]
+    results = [calls[0]()]
+    results.extend(future.result() for future in futures)
+    return results
@@ -6,10 +6,12 @@ Used by both posts.py and profile.py to avoid code duplication.
 """
 
 import uuid
+from flask import request, Response
 from werkzeug.utils import secure_filename
 from src.extensions import mongo
 from src.logger import logger
 from gridfs import GridFS
+from bson import ObjectId
 import datetime
 
 # File upload configuration
@@ -37,6 +39,21 @@ ALLOWED_EXTENSIONS = {
 }
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
 MAX_TOTAL_UPLOAD_SIZE = 64 * 1024 * 1024  # 64MB per request (aggregate)
+DOWNLOAD_CHUNK_SIZE = 255 * 1024  # Matches the default GridFS chunk size
+
+# GridFS handle shared across requests (created on first use, after mongo is initialized).
+# A GridFS instance only ensures its indexes on its first write, so reusing it skips
+# that index check on every later upload.
+_gridfs = None
+
+
+def _get_gridfs():
+    """Get the shared GridFS instance"""
+    global _gridfs
+    if _gridfs is None:
+        _gridfs = GridFS(mongo.db)
+    return _gridfs
+
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
@@ -98,8 +115,8 @@ def upload_files_to_gridfs(files, user_id, max_files=10):
         if len(files) > max_files:
             return False, f"Cannot upload more than {max_files} files at once", []
         
-        # Initialize GridFS
-        fs = GridFS(mongo.db)
+        # Shared GridFS instance
+        fs = _get_gridfs()
         uploaded_files = []
         total_size = 0
         
@@ -169,12 +186,10 @@ def get_file_from_gridfs(file_id):
         tuple: (success, error_message, file_object)
     """
     try:
-        from bson import ObjectId
-        
         if not ObjectId.is_valid(file_id):
             return False, "Invalid file ID format", None
         
-        fs = GridFS(mongo.db)
+        fs = _get_gridfs()
         file_obj = fs.get(ObjectId(file_id))
         
         if not file_obj:
@@ -195,22 +210,20 @@ def download_file_from_post(post_id, file_id):
         file_id: File ID to download
     
     Returns:
-        tuple: (success, error_message, file_data, file_info)
+        tuple: (success, error_message, file_object, file_info)
     """
     try:
-        from bson import ObjectId
+        # Reject malformed IDs up front instead of letting ObjectId() raise
+        if not ObjectId.is_valid(post_id):
+            return False, "Invalid post ID format", None, None
         
         # Verify post exists
-        post = mongo.db.posts.find_one({"_id": ObjectId(post_id)})
+        post = mongo.db.posts.find_one({"_id": ObjectId(post_id)}, {"files": 1})
         if not post:
             return False, "Post not found", None, None
         
-        # Find the file in the post
-        file_info = None
-        for file in post.get("files", []):
-            if str(file["file_id"]) == file_id:
-                file_info = file
-                break
+        # Find the file in the post (first match)
+        file_info = next((file for file in post.get("files", []) if str(file["file_id"]) == file_id), None)
         
         if not file_info:
             return False, "File not found", None, None
@@ -220,17 +233,66 @@ def download_file_from_post(post_id, file_id):
         if not success or not file_obj:
             return False, error_msg or "File not found in storage", None, None
         
-        # Read file data
-        file_data = file_obj.read()
-        
-        # Ensure file_data is bytes
-        if isinstance(file_data, str):
-            file_data = file_data.encode('utf-8')
-        elif not isinstance(file_data, bytes):
-            file_data = bytes(file_data)
-        
-        return True, None, file_data, file_info
+        return True, None, file_obj, file_info
         
     except Exception as e:
         logger.error(f"Error downloading file {file_id} from post {post_id}: {str(e)}")
         return False, f"Error downloading file: {str(e)}", None, None
+
+
+def _iter_gridfs_file(file_obj, start, stop):
+    """Yield a GridFS file's bytes from start up to stop, one chunk at a time"""
+    try:
+        file_obj.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            data = file_obj.read(min(DOWNLOAD_CHUNK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            yield data
+    finally:
+        file_obj.close()
+
+
+def send_gridfs_file(file_obj, filename, content_type):
+    """
+    Stream a GridFS file to the client, honouring single byte-range requests.
+    
+    The file is read chunk by chunk while the response is sent, so memory use
+    stays constant regardless of file size and interrupted downloads can resume.
+    
+    Args:
+        file_obj: GridOut file from GridFS
+        filename: Download filename for Content-Disposition
+        content_type: MIME type of the file
+    
+    Returns:
+        Flask Response (200, 206 for a single range, or 416 for an unsatisfiable range)
+    """
+    length = file_obj.length
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Accept-Ranges": "bytes"
+    }
+    
+    start, stop, status = 0, length, 200
+    # Only a single byte range is served as 206; multi-range (or non-byte) requests
+    # get the whole file, which RFC 9110 allows in place of a multipart response
+    if request.range and request.range.units == "bytes" and len(request.range.ranges) == 1:
+        byte_range = request.range.range_for_length(length)
+        if byte_range is None:
+            file_obj.close()
+            return Response(status=416, headers={"Content-Range": f"bytes */{length}"})
+        start, stop = byte_range
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{stop - 1}/{length}"
+    
+    headers["Content-Length"] = str(stop - start)
+    return Response(
+        _iter_gridfs_file(file_obj, start, stop),
+        status=status,
+        mimetype=content_type,
+        headers=headers,
+        direct_passthrough=True
+    )
@@ -0,0 +1,70 @@
+"""
+Pagination Utilities
+
+Keyset (cursor) pagination shared by the newest-first list endpoints.
+"""
+
+from flask import request
+from bson import ObjectId
+
+# Page size used when the client sends a cursor without a limit, and the hard cap
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+def find_newest_first(collection, query, projection=None, default_limit=DEFAULT_PAGE_SIZE, max_limit=MAX_PAGE_SIZE):
+    """
+    Find documents newest first, with optional keyset pagination from the request.
+
+    Reads the optional `limit` and `cursor` query parameters. The cursor is the
+    ID of the last document of the previous page; results continue strictly
+    after it on (created_at, _id), so pages stay stable while new documents arrive.
+
+    Args:
+        collection: MongoDB collection to read from
+        query: Base filter (the cursor document must match it too)
+        projection: Optional projection for the returned documents
+        default_limit: Page size when the client sends a cursor without a limit
+            (pass the endpoint's own page-mode default so pages keep their size)
+        max_limit: Largest page size a client may ask for
+
+    Returns:
+        Tuple of (cursor, limit, error). limit is None when the client did not
+        paginate; error is a message for a 400 response (cursor is then None),
+        e.g. for a malformed cursor or a non-numeric limit.
+    """
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor', '').strip()
+    query = dict(query)
+
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            return None, None, "Invalid limit"
+
+    if cursor:
+        if not ObjectId.is_valid(cursor):
+            return None, None, "Invalid cursor format"
+        cursor_doc = collection.find_one({**query, "_id": ObjectId(cursor)}, {"created_at": 1})
+        if not cursor_doc:
+            return None, None, "Invalid cursor"
+        query["$or"] = [
+            {"created_at": {"$lt": cursor_doc["created_at"]}},
+            {"created_at": cursor_doc["created_at"], "_id": {"$lt": cursor_doc["_id"]}}
+        ]
+
+    results = collection.find(query, projection).sort([("created_at", -1), ("_id", -1)])
+    if limit is not None or cursor:
+        limit = min(max(default_limit if limit is None else limit, 1), max_limit)
+        results = results.limit(limit)
+    else:
+        limit = None
+    return results, limit, None
+
+
+def next_cursor_headers(items, limit):
+    """Build the X-Next-Cursor header for a page (only a full page can have more after it)"""
+    if limit is not None and len(items) == limit:
+        return {"X-Next-Cursor": items[-1]["id"]}
+    return {}
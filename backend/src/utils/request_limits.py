@@ -0,0 +1,90 @@
+"""
+Request Limit Utilities
+
+Caps how many requests of one kind a single user may have in flight at once,
+on top of Flask-Limiter's per-minute rate limits.
+"""
+
+import os
+import time
+from functools import wraps
+from flask_jwt_extended import get_jwt_identity
+from src.config import Config
+from src.extensions import get_redis
+from src.logger import logger
+
+# Atomically drop expired slots, check the in-flight count and take a slot (1) or refuse (0).
+# KEYS[1] = per-user sorted set; ARGV = now, slot lifetime (s), max in flight, request ID
+_ACQUIRE_SLOT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - ttl)
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('EXPIRE', KEYS[1], ttl)
+return 1
+"""
+
+# Registered script for the shared Redis client (loaded once, then run by SHA)
+_acquire_slot = None
+
+
+def _get_acquire_slot_script(r):
+    """Get the slot acquisition script registered on the shared Redis client"""
+    global _acquire_slot
+    if _acquire_slot is None:
+        _acquire_slot = r.register_script(_ACQUIRE_SLOT_SCRIPT)
+    return _acquire_slot
+
+
+def limit_concurrent_requests(name, max_in_flight=None):
+    """
+    Limit how many `name` requests the current user may have in flight at once.
+
+    Must be applied below @jwt_required() so the user identity is available.
+    Slots are tracked in a Redis sorted set per user; a slot is released when the
+    request finishes and expires on its own after CONCURRENT_REQUEST_SLOT_TTL seconds
+    if the worker dies mid-request. Without Redis (or if Redis fails) requests are let through.
+
+    Args:
+        name: Key prefix shared by the endpoints that count towards the same limit
+        max_in_flight: Concurrent requests allowed per user (default: Config.MAX_CONCURRENT_TOGGLES)
+
+    Returns:
+        Decorator that answers 429 when the user is already at the limit
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            r = get_redis()
+            if not r:
+                return func(*args, **kwargs)
+
+            key = f"inflight:{name}:{get_jwt_identity()}"
+            request_id = os.urandom(4).hex()
+            limit = max_in_flight or Config.MAX_CONCURRENT_TOGGLES
+            try:
+                acquired = _get_acquire_slot_script(r)(
+                    keys=[key],
+                    args=[time.time(), Config.CONCURRENT_REQUEST_SLOT_TTL, limit, request_id]
+                )
+            except Exception as e:
+                # Fail open like the rate limiter does when Redis is unavailable
+                logger.warning(f"Concurrent request limit check failed: {str(e)}")
+                return func(*args, **kwargs)
+
+            if not acquired:
+                return {"message": "Too many concurrent requests, please slow down"}, 429
+
+            try:
+                return func(*args, **kwargs)
+            finally:
+                # Free the slot as soon as the request is done
+                try:
+                    r.zrem(key, request_id)
+                except Exception as e:
+                    logger.warning(f"Failed to release concurrent request slot: {str(e)}")
+        return wrapper
+    return decorator
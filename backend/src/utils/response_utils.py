@@ -0,0 +1,24 @@
+"""
+Response Utilities
+
+Shared helpers for building API responses.
+"""
+
+from flask import request, Response
+
+
+def wants_minimal_response():
+    """Check if the client asked for an empty body via `Prefer: return=minimal` (RFC 7240)"""
+    return "return=minimal" in request.headers.get("Prefer", "")
+
+
+def delete_success(message):
+    """
+    Build the success response for a DELETE endpoint.
+    
+    Returns an empty 204 when the client prefers a minimal response,
+    otherwise the usual JSON message with 200.
+    """
+    if wants_minimal_response():
+        return Response(status=204)
+    return {"message": message}, 200
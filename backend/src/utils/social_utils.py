@@ -5,10 +5,47 @@ Common helper functions for social interactions including likes, comments, and r
 This module provides shared utilities across social modules.
 """
 
-from src.extensions import mongo
+from flask import g, has_request_context
+from flask_jwt_extended import get_jwt, get_jwt_identity
+from src.extensions import mongo, get_redis
 from src.logger import logger
 from bson import ObjectId
+from bson.errors import InvalidId
 import datetime
+import orjson
+import threading
+import time
+
+# Process-wide cache of user display info: user ID string -> (expires_at, info)
+# Usernames rarely change, and profile updates invalidate their own entry
+USER_INFO_CACHE_TTL = 300
+USER_INFO_CACHE_SIZE = 10000
+_user_info_cache = {}
+_user_info_lock = threading.Lock()
+
+# Process-wide cache of post IDs recently seen to exist: post ID string -> expires_at
+# Kept short so a post deleted through another worker is forgotten within seconds
+POST_EXISTS_CACHE_TTL = 5
+POST_EXISTS_CACHE_SIZE = 10000
+_post_exists_cache = {}
+_post_exists_lock = threading.Lock()
+
+# Process-wide cache of the fields of comments and replies that never change after creation
+# (author and parent IDs): (collection, ID string) -> (expires_at, document). Same short TTL
+# as the post cache so a delete through another worker is forgotten within seconds
+PARENT_REF_CACHE_TTL = 5
+PARENT_REF_CACHE_SIZE = 10000
+PARENT_REF_PROJECTION = {"user_id": 1, "post_id": 1, "comment_id": 1}
+_parent_ref_cache = {}
+_parent_ref_lock = threading.Lock()
+
+# Unread notification counts are cached in Redis (shared by all workers) and dropped
+# whenever a recipient's notifications change; the TTL bounds staleness after cascades
+UNREAD_COUNT_CACHE_TTL = 30
+
+# Public profile headers are cached in Redis and dropped when the user's profile or
+# post count changes; the TTL bounds how stale likes_received can get
+PUBLIC_PROFILE_CACHE_TTL = 60
 
 
 def to_object_id(val):
@@ -25,67 +62,328 @@ def to_object_id(val):
         return None
     if isinstance(val, ObjectId):
         return val
-    return ObjectId(str(val)) if ObjectId.is_valid(str(val)) else None
+    # Parse once - invalid input raises instead of being validated and then parsed again
+    try:
+        return ObjectId(str(val))
+    except (InvalidId, TypeError):
+        return None
+
+
+def get_cached_document(collection_name, doc_id, projection=None):
+    """
+    Read a document by _id, memoized for the rest of the current request.
+    
+    Only use this for documents that are not modified later in the same request.
+    Outside a request (e.g. background tasks) the lookup is not cached.
+    
+    Args:
+        collection_name: MongoDB collection name
+        doc_id: Document ID (ObjectId or string)
+        projection: Optional projection (part of the cache key)
+    
+    Returns:
+        The document, or None if it does not exist
+    """
+    doc_id = ObjectId(doc_id)
+    if not has_request_context():
+        return mongo.db[collection_name].find_one({"_id": doc_id}, projection)
+    
+    cache = g.setdefault("_doc_cache", {})
+    key = (collection_name, doc_id, tuple(sorted(projection.items())) if projection else None)
+    if key not in cache:
+        cache[key] = mongo.db[collection_name].find_one({"_id": doc_id}, projection)
+    return cache[key]
+
+
+def get_documents_by_ids(collection_name, doc_ids, projection=None):
+    """
+    Read many documents by _id with a single $in query.
+    
+    Args:
+        collection_name: MongoDB collection name
+        doc_ids: Iterable of document IDs (ObjectId or string)
+        projection: Optional projection
+    
+    Returns:
+        Dict mapping document ID string to document (missing documents are omitted)
+    """
+    doc_ids = list({ObjectId(doc_id) for doc_id in doc_ids})
+    if not doc_ids:
+        return {}
+    return {
+        str(doc["_id"]): doc
+        for doc in mongo.db[collection_name].find({"_id": {"$in": doc_ids}}, projection)
+    }
+
+
+def _cache_user_info(info):
+    """Store user info in the process-wide cache, evicting the oldest entry when full"""
+    with _user_info_lock:
+        if len(_user_info_cache) >= USER_INFO_CACHE_SIZE:
+            _user_info_cache.pop(next(iter(_user_info_cache)), None)
+        _user_info_cache[info["id"]] = (time.monotonic() + USER_INFO_CACHE_TTL, info)
+
+
+def _get_cached_user_info(user_id):
+    """Return a copy of cached user info, or None if missing or expired"""
+    entry = _user_info_cache.get(str(user_id))
+    if entry and entry[0] > time.monotonic():
+        return dict(entry[1])
+    return None
+
+
+def invalidate_user_info(user_id, info=None):
+    """
+    Drop a user's cached info, or replace it with fresh info when given.
+    
+    Call after changing username/email or deleting the user.
+    """
+    with _user_info_lock:
+        _user_info_cache.pop(str(user_id), None)
+    if info:
+        _cache_user_info(info)
 
 
 def get_user_info(user_id):
-    """Get user information by user ID"""
-    user = mongo.db.users.find_one({"_id": ObjectId(user_id)})
+    """Get user information by user ID (served from a short-lived cache when possible)"""
+    info = _get_cached_user_info(user_id)
+    if info:
+        return info
+    
+    user = get_cached_document("users", user_id, {"username": 1, "email": 1})
     if user:
-        return {
+        info = {
             "id": str(user["_id"]),
             "username": user["username"],
             "email": user["email"]
         }
+        _cache_user_info(info)
+        return dict(info)
     return None
 
 
-def check_post_exists(post_id):
-    """Check if post exists and return error message with status code"""
+def get_users_info(user_ids):
+    """
+    Get user information for many users with a single query.
+    
+    Args:
+        user_ids: Iterable of user IDs (ObjectId or string)
+    
+    Returns:
+        Dict mapping user ID string to user info (missing users are omitted)
+    """
+    result = {}
+    missing_ids = set()
+    for user_id in user_ids:
+        info = _get_cached_user_info(user_id)
+        if info:
+            result[info["id"]] = info
+        else:
+            missing_ids.add(ObjectId(user_id))
+    
+    # Fetch everything not in the cache with one query
+    if missing_ids:
+        users = mongo.db.users.find(
+            {"_id": {"$in": list(missing_ids)}},
+            {"username": 1, "email": 1}
+        )
+        for user in users:
+            info = {
+                "id": str(user["_id"]),
+                "username": user["username"],
+                "email": user["email"]
+            }
+            _cache_user_info(info)
+            result[info["id"]] = dict(info)
+    return result
+
+
+def get_user_posts_count(user_id):
+    """
+    Get a user's post count from the counter stored on their user document.
+    
+    New users start with posts_count 0 and existing users get it from the one-off
+    backfill (see backfill_user_posts_counts). Until that has run, the count is read
+    live and nothing is stored, so a racing write can't leave it stale.
+    
+    Returns:
+        The post count (0 for unknown users)
+    """
+    user_oid = ObjectId(user_id)
+    user = mongo.db.users.find_one({"_id": user_oid}, {"posts_count": 1})
+    if not user:
+        return 0
+    if "posts_count" in user:
+        return user["posts_count"]
+    
+    return mongo.db.posts.count_documents({"user_id": user_oid})
+
+
+def increment_user_posts_count(user_id, amount=1):
+    """Adjust a user's stored post count (users without one are counted live until the backfill migration runs)"""
+    mongo.db.users.update_one({"_id": ObjectId(user_id), "posts_count": {"$exists": True}}, {"$inc": {"posts_count": amount}})
+
+
+def attach_authors(posts):
+    """
+    Attach an `author` ({username, id}) to each post with one batched user lookup.
+    
+    Args:
+        posts: List of post documents (user_id as ObjectId or string)
+    
+    Returns:
+        The same list, with posts updated in place
+    """
+    authors = get_users_info({post["user_id"] for post in posts})
+    
+    # One author dict per distinct user, shared by all of their posts on the page
+    author_by_id = {}
+    for post in posts:
+        user_oid = post["user_id"]
+        author = author_by_id.get(user_oid)
+        if author is None:
+            author_id = str(user_oid)
+            info = authors.get(author_id)
+            author = author_by_id[user_oid] = {
+                "username": info["username"] if info else f"User{author_id[-4:]}",
+                "id": author_id
+            }
+        post["author"] = author
+    return posts
+
+
+def get_current_user_info():
+    """
+    Get the current user's information from the access token claims.
+    
+    A cached entry wins over the claims, so a username/email change made in this
+    process shows up before the token is refreshed. Falls back to a database
+    lookup for tokens issued without profile claims.
+    """
+    user_id = get_jwt_identity()
+    info = _get_cached_user_info(user_id)
+    if info:
+        return info
+    claims = get_jwt()
+    if claims.get("username") and claims.get("email"):
+        return {
+            "id": user_id,
+            "username": claims["username"],
+            "email": claims["email"]
+        }
+    return get_user_info(user_id)
+
+
+def check_post_exists(post_id, cached=False):
+    """
+    Check if post exists and return error message with status code.
+    
+    With cached=True a recent hit is reused. Only use it on read paths: the entry can
+    outlive a delete by up to POST_EXISTS_CACHE_TTL, and writes must not create orphans.
+    """
     if not ObjectId.is_valid(post_id):
         return "Invalid post ID format", 400
     
-    # Use count_documents for better performance - only checks existence
-    count = mongo.db.posts.count_documents({"_id": ObjectId(post_id)})
+    # A post page fires several requests in a row (post, likes, comments) - reuse a recent hit
+    if cached:
+        expires_at = _post_exists_cache.get(str(post_id))
+        if expires_at and expires_at > time.monotonic():
+            return None, None
+    
+    # Use count_documents for better performance - only checks existence (stops at the first match)
+    count = mongo.db.posts.count_documents({"_id": ObjectId(post_id)}, limit=1)
     if count == 0:
         return "Post not found", 404
     
+    with _post_exists_lock:
+        if len(_post_exists_cache) >= POST_EXISTS_CACHE_SIZE:
+            _post_exists_cache.pop(next(iter(_post_exists_cache)), None)
+        _post_exists_cache[str(post_id)] = time.monotonic() + POST_EXISTS_CACHE_TTL
+    
     return None, None  # No error means post exists
 
 
-def check_comment_exists(comment_id):
-    """Check if comment exists and return it with status code"""
+def invalidate_post_exists(*post_ids):
+    """Forget cached existence of posts (call before deleting them)"""
+    with _post_exists_lock:
+        for post_id in post_ids:
+            _post_exists_cache.pop(str(post_id), None)
+
+
+def _find_parent_ref(collection_name, doc_id):
+    """Read a comment/reply's immutable fields, reusing a recent hit (misses are never cached)"""
+    key = (collection_name, str(doc_id))
+    entry = _parent_ref_cache.get(key)
+    if entry and entry[0] > time.monotonic():
+        return dict(entry[1])
+    
+    doc = mongo.db[collection_name].find_one({"_id": ObjectId(doc_id)}, PARENT_REF_PROJECTION)
+    if doc:
+        with _parent_ref_lock:
+            if len(_parent_ref_cache) >= PARENT_REF_CACHE_SIZE:
+                _parent_ref_cache.pop(next(iter(_parent_ref_cache)), None)
+            _parent_ref_cache[key] = (time.monotonic() + PARENT_REF_CACHE_TTL, dict(doc))
+    return doc
+
+
+def invalidate_parent_refs(collection_name, *doc_ids):
+    """Forget cached comments or replies (call when deleting them)"""
+    with _parent_ref_lock:
+        for doc_id in doc_ids:
+            _parent_ref_cache.pop((collection_name, str(doc_id)), None)
+
+
+def check_comment_exists(comment_id, projection=None, cached=False):
+    """
+    Check if comment exists and return it with status code (optionally only the projected fields).
+    
+    With cached=True only the immutable fields (_id, user_id, post_id) are returned,
+    served from a short-lived cache when possible. Only use it on read paths: the entry can
+    outlive a delete by up to PARENT_REF_CACHE_TTL, and writes must not create orphans.
+    """
     if not ObjectId.is_valid(comment_id):
         return None, "Invalid comment ID format", 400
     
-    comment = mongo.db.comments.find_one({"_id": ObjectId(comment_id)})
+    if cached:
+        comment = _find_parent_ref("comments", comment_id)
+    else:
+        comment = mongo.db.comments.find_one({"_id": ObjectId(comment_id)}, projection)
     if not comment:
         return None, "Comment not found", 404
     
     return comment, None, None
 
 
-def check_reply_exists(reply_id):
-    """Check if reply exists and return it with status code"""
+def check_reply_exists(reply_id, projection=None, cached=False):
+    """
+    Check if reply exists and return it with status code (optionally only the projected fields).
+    
+    With cached=True only the immutable fields (_id, user_id, post_id, comment_id) are returned,
+    served from a short-lived cache when possible. Only use it on read paths: the entry can
+    outlive a delete by up to PARENT_REF_CACHE_TTL, and writes must not create orphans.
+    """
     if not ObjectId.is_valid(reply_id):
         return None, "Invalid reply ID format", 400
     
-    reply = mongo.db.replies.find_one({"_id": ObjectId(reply_id)})
+    if cached:
+        reply = _find_parent_ref("replies", reply_id)
+    else:
+        reply = mongo.db.replies.find_one({"_id": ObjectId(reply_id)}, projection)
     if not reply:
         return None, "Reply not found", 404
     
     return reply, None, None
 
 
-def format_reply(reply):
-    """Format a reply document for API response"""
+def format_reply(reply, user=None):
+    """Format a reply document for API response (user: pre-resolved author info, skips the lookup)"""
     # Store original IDs before conversion
     original_id = reply["_id"]
     original_user_id = reply["user_id"]
     
     # Convert fields for API response
     reply["id"] = str(original_id)
-    reply["user"] = get_user_info(original_user_id)
+    reply["user"] = user or get_user_info(original_user_id)
     reply["comment_id"] = str(reply["comment_id"])
     reply["post_id"] = str(reply["post_id"])
     reply["created_at"] = reply["created_at"].isoformat()
@@ -98,15 +396,15 @@ def format_reply(reply):
     return reply
 
 
-def format_comment(comment, include_replies=True):
-    """Format a comment document for API response"""
+def format_comment(comment, include_replies=True, user=None):
+    """Format a comment document for API response (user: pre-resolved author info, skips the lookup)"""
     # Store original IDs before conversion
     original_id = comment["_id"]
     original_user_id = comment["user_id"]
     
     # Convert fields for API response
     comment["id"] = str(original_id)
-    comment["user"] = get_user_info(original_user_id)
+    comment["user"] = user or get_user_info(original_user_id)
     comment["post_id"] = str(comment["post_id"])
     comment["created_at"] = comment["created_at"].isoformat()
     comment["updated_at"] = comment["updated_at"].isoformat()
@@ -150,25 +448,52 @@ def create_notification(recipient_id, actor_id, notif_type, *, post_id=None, com
         post_id/comment_id/reply_id: Optional context ids
         message (str|None): Optional custom message
 
+    Returns:
+        None (errors are logged but do not raise)
+    """
+    create_notifications(
+        [recipient_id], actor_id, notif_type,
+        post_id=post_id, comment_id=comment_id, reply_id=reply_id, message=message
+    )
+
+
+def create_notifications(recipient_ids, actor_id, notif_type, *, post_id=None, comment_id=None, reply_id=None, message=None):
+    """Create the same notification for several recipients with a single insert.
+
+    Duplicate recipients and self-actions are skipped.
+
+    Args:
+        recipient_ids (list[str|ObjectId]): Users who receive the notification
+        actor_id (str|ObjectId): User who performed the action
+        notif_type (str): One of supported types
+        post_id/comment_id/reply_id: Optional context ids
+        message (str|None): Optional custom message
+
     Returns:
         None (errors are logged but do not raise)
     """
     try:
         # Normalize ids to ObjectId
-        recipient_oid = to_object_id(recipient_id)
         actor_oid = to_object_id(actor_id)
         post_oid = to_object_id(post_id)
         comment_oid = to_object_id(comment_id)
         reply_oid = to_object_id(reply_id)
 
-        if not recipient_oid or not actor_oid:
+        if not actor_oid:
             return
 
-        # Do not notify for self-actions
-        if recipient_oid == actor_oid:
+        # Unique recipients, excluding the actor (do not notify for self-actions)
+        recipient_oids = []
+        for recipient_id in recipient_ids:
+            recipient_oid = to_object_id(recipient_id)
+            if recipient_oid and recipient_oid != actor_oid and recipient_oid not in recipient_oids:
+                recipient_oids.append(recipient_oid)
+
+        if not recipient_oids:
             return
 
-        notification = {
+        created_at = datetime.datetime.utcnow()
+        notifications = [{
             "recipient_id": recipient_oid,
             "actor_id": actor_oid,
             "type": notif_type,
@@ -177,15 +502,79 @@ def create_notification(recipient_id, actor_id, notif_type, *, post_id=None, com
             "reply_id": reply_oid,
             "message": message,
             "read": False,
-            "created_at": datetime.datetime.utcnow()
-        }
+            "created_at": created_at
+        } for recipient_oid in recipient_oids]
 
-        mongo.db.notifications.insert_one(notification)
+        mongo.db.notifications.insert_many(notifications, ordered=False)
+        invalidate_unread_count(*recipient_oids)
     except Exception as e:
         # Never crash the main flow due to notification failures
         logger.error(f"Failed to create notification: {str(e)}")
 
 
+def get_unread_count(user_id):
+    """Get a user's unread notification count (cached in Redis when available)"""
+    key = f"notif:unread:{user_id}"
+    r = get_redis()
+    if r:
+        try:
+            cached = r.get(key)
+            if cached is not None:
+                return int(cached)
+        except Exception:
+            r = None
+    
+    count = mongo.db.notifications.count_documents({"recipient_id": ObjectId(user_id), "read": False})
+    if r:
+        try:
+            r.setex(key, UNREAD_COUNT_CACHE_TTL, count)
+        except Exception:
+            pass
+    return count
+
+
+def invalidate_unread_count(*user_ids):
+    """Drop cached unread counts (call after creating, reading or deleting a user's notifications)"""
+    r = get_redis()
+    if r and user_ids:
+        try:
+            r.delete(*(f"notif:unread:{user_id}" for user_id in user_ids))
+        except Exception as e:
+            logger.warning(f"Failed to invalidate unread counts: {str(e)}")
+
+
+def get_cached_public_profile(user_id):
+    """Get a cached public profile response, or None on a miss (or without Redis)"""
+    r = get_redis()
+    if not r:
+        return None
+    try:
+        cached = r.get(f"profile:public:{user_id}")
+        return orjson.loads(cached) if cached else None
+    except Exception:
+        return None
+
+
+def cache_public_profile(user_id, profile):
+    """Store a public profile response in Redis (no-op without Redis)"""
+    r = get_redis()
+    if r:
+        try:
+            r.setex(f"profile:public:{user_id}", PUBLIC_PROFILE_CACHE_TTL, orjson.dumps(profile))
+        except Exception as e:
+            logger.warning(f"Failed to cache public profile for {user_id}: {str(e)}")
+
+
+def invalidate_public_profile(*user_ids):
+    """Drop cached public profiles (call after a user's profile or post count changes)"""
+    r = get_redis()
+    if r and user_ids:
+        try:
+            r.delete(*(f"profile:public:{user_id}" for user_id in user_ids))
+        except Exception as e:
+            logger.warning(f"Failed to invalidate public profiles: {str(e)}")
+
+
 def delete_notification(recipient_id, actor_id, notif_type, *, post_id=None, comment_id=None, reply_id=None):
     """Delete a notification matching the given criteria.
     
@@ -226,6 +615,7 @@ def delete_notification(recipient_id, actor_id, notif_type, *, post_id=None, com
         # Delete matching notification
         result = mongo.db.notifications.delete_one(query)
         if result.deleted_count > 0:
+            invalidate_unread_count(recipient_oid)
             logger.debug(f"Deleted notification: {notif_type} for recipient {recipient_oid} from actor {actor_oid}")
     except Exception as e:
         # Never crash the main flow due to notification failures
@@ -0,0 +1,16 @@
+"""
+Validation Utilities
+
+Input checks shared by the endpoints that create and edit the same fields.
+"""
+
+import re
+
+# GitHub repository URL: https://github.com/<owner>/<repo>, optionally followed by a path,
+# query or fragment (e.g. /tree/main, .git). Compiled once, single linear pass
+GITHUB_REPO_REGEX = re.compile(r"^https://github\.com/[A-Za-z0-9._-]{1,39}/[A-Za-z0-9._-]{1,100}(?:[/?#]\S*)?$")
+
+
+def is_valid_github_link(url):
+    """Check that a URL points into a GitHub repository (https://github.com/<owner>/<repo>[...])"""
+    return bool(GITHUB_REPO_REGEX.match(url))
@@ -52,10 +52,10 @@ const Likes: React.FC<LikesProps> = ({
     
     const checkLikeStatus = async () => {
       try {
-        const response = await authenticatedFetch(`${API_BASE}/api/social/likes/posts/${postId}/likes`);
+        const response = await authenticatedFetch(`${API_BASE}/api/social/likes/posts/${postId}/like`);
         if (response.ok) {
-          const likes = await response.json();
-          setLiked(likes.some((like: Like) => like.user.id === currentUserId));
+          const data = await response.json();
+          setLiked(data.liked);
         }
       } catch (error) {
         // Could not check like status, use initial value